@@ -0,0 +1,145 @@
+"""DMN 결정 테이블 조건용 FEEL 부분집합 평가기.
+
+지원: `-`(무조건), 리터럴 동등 비교(숫자/"문자열"/true/false), `< <= > >= = !=` 비교,
+`[a..b]`/`(a..b)`/`]a..b[` 범위, 쉼표로 구분된 여러 조건(OR).
+그 외 표현식은 None을 반환하므로 호출 측에서 LLM 추론으로 넘긴다.
+"""
+from __future__ import annotations
+
+import operator
+import re
+from functools import lru_cache
+from typing import Any, Callable, List, Optional
+
+Predicate = Callable[[Any], bool]
+
+_UNSUPPORTED = object()
+
+
+class UnsupportedInput(ValueError):
+    """입력값을 조건의 리터럴 타입으로 해석할 수 없음(예: 숫자 조건에 "25세 남성")."""
+
+_COMPARE_RE = re.compile(r'^(<=|>=|!=|<|>|=)\s*(.+)$')
+_RANGE_RE = re.compile(r'^([\[\(\]])\s*(.+?)\s*\.\.\s*(.+?)\s*([\]\)\[])$')
+_NUMBER_RE = re.compile(r'^[+-]?(\d+(\.\d*)?|\.\d+)$')
+
+_COMPARE_OPS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '=': operator.eq,
+    '!=': operator.ne,
+}
+
+
+def parse_literal(text: str) -> Any:
+    """FEEL 리터럴(숫자/"문자열"/true/false)을 Python 값으로. 지원하지 않으면 _UNSUPPORTED."""
+    text = text.strip()
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"' and '"' not in text[1:-1]:
+        return text[1:-1]
+    if _NUMBER_RE.match(text):
+        number = float(text)
+        return int(number) if number.is_integer() and '.' not in text else number
+    if text == 'true':
+        return True
+    if text == 'false':
+        return False
+    return _UNSUPPORTED
+
+
+def _coerce(value: Any, like: Any) -> Any:
+    """입력값을 비교 대상 리터럴 타입에 맞춤(예: "25" → 25). 맞출 수 없으면 _UNSUPPORTED."""
+    if isinstance(like, bool):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+            return value.strip().lower() == 'true'
+        return _UNSUPPORTED
+    if isinstance(like, (int, float)):
+        if isinstance(value, bool):
+            return _UNSUPPORTED
+        if isinstance(value, (int, float)):
+            return value
+        try:
+            return float(str(value).strip())
+        except ValueError:
+            return _UNSUPPORTED
+    return value if isinstance(value, str) else str(value)
+
+
+def _compare(op: Callable[[Any, Any], bool], literal: Any) -> Predicate:
+    def _test(value: Any) -> bool:
+        coerced = _coerce(value, literal)
+        if coerced is _UNSUPPORTED:
+            raise UnsupportedInput(value)
+        return op(coerced, literal)
+    return _test
+
+
+def _split_tests(text: str) -> List[str]:
+    """따옴표 밖의 쉼표로 unary test들을 분리."""
+    parts: List[str] = []
+    buf: List[str] = []
+    in_str = False
+    for ch in text:
+        if ch == '"':
+            in_str = not in_str
+        if ch == ',' and not in_str:
+            parts.append(''.join(buf))
+            buf.clear()
+        else:
+            buf.append(ch)
+    parts.append(''.join(buf))
+    return [p.strip() for p in parts]
+
+
+def _parse_single(text: str) -> Optional[Predicate]:
+    m = _RANGE_RE.match(text)
+    if m:
+        lo, hi = parse_literal(m.group(2)), parse_literal(m.group(3))
+        if lo is _UNSUPPORTED or hi is _UNSUPPORTED:
+            return None
+        lo_test = _compare(operator.ge if m.group(1) == '[' else operator.gt, lo)
+        hi_test = _compare(operator.le if m.group(4) == ']' else operator.lt, hi)
+        return lambda value: lo_test(value) and hi_test(value)
+
+    m = _COMPARE_RE.match(text)
+    if m:
+        literal = parse_literal(m.group(2))
+        if literal is _UNSUPPORTED:
+            return None
+        return _compare(_COMPARE_OPS[m.group(1)], literal)
+
+    literal = parse_literal(text)
+    if literal is _UNSUPPORTED:
+        return None
+    return _compare(operator.eq, literal)
+
+
+@lru_cache(maxsize=4096)
+def parse_condition(text: Optional[str]) -> Optional[Predicate]:
+    """inputEntry 텍스트를 술어로 변환. 지원하지 않는 표현식이면 None."""
+    text = (text or '').strip()
+    if text in ('', '-'):
+        return lambda value: True
+    tests = []
+    for part in _split_tests(text):
+        if not part:
+            return None
+        test = _parse_single(part)
+        if test is None:
+            return None
+        tests.append(test)
+    if len(tests) == 1:
+        return tests[0]
+    return lambda value: any(test(value) for test in tests)
+
+
+def output_value(text: Optional[str]) -> Optional[Any]:
+    """outputEntry 텍스트를 값으로(리터럴이 아니면 원문 그대로)."""
+    text = (text or '').strip()
+    if not text:
+        return None
+    literal = parse_literal(text)
+    return text if literal is _UNSUPPORTED else literal
@@ -1,11 +1,17 @@
 import asyncio
 import json
+import concurrent.futures
+import functools
 import logging
-import uuid
-from typing import Any, Dict, List, Optional, Tuple
+import os
+import sys
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Union
 
 import httpx
-from pydantic import BaseModel, Field, ConfigDict, model_validator
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, model_validator
 from crewai.tools import BaseTool
 
 # A2A SDK (동일 인터페이스 가정)
@@ -23,6 +29,21 @@ from a2a.types import (
 
 logger = logging.getLogger(__name__)
 
+try:  # orjson이 있으면 응답 직렬화에 사용(없으면 표준 json)
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+try:  # HTTP/2는 h2 패키지가 있을 때만 사용
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
 
 # ===========================
 # Models
@@ -32,6 +53,9 @@ class AgentEndpoint(BaseModel):
     headers: Dict[str, str] = Field(default_factory=dict)
 
 
+_DEFAULT_OUTPUT_MODES: Tuple[str, ...] = ("text",)
+
+
 class A2AAgentToolInput(BaseModel):
     """툴 입력 스키마(알 수 없는 키는 payload로 흡수)."""
 
@@ -40,136 +64,308 @@ class A2AAgentToolInput(BaseModel):
     message: Optional[str] = None
     payload: Optional[Dict[str, Any]] = None
     skill: Optional[str] = None
-    accepted_output_modes: List[str] = Field(default_factory=lambda: ["text"])  # e.g., ["text", "html", "image"]
+    accepted_output_modes: Tuple[str, ...] = _DEFAULT_OUTPUT_MODES  # e.g., ("text", "html", "image")
     blocking: bool = True
     timeout_sec: int = 60
+    max_history: int = Field(40, ge=3)  # 응답 meta.history 최대 길이(앞 2개 + 생략 표시 + 뒤쪽)
+    include_history: bool = True  # False면 meta.history 없이 결과/상태만 반환
 
-    @model_validator(mode="after")
-    def _ensure_any_input(self) -> "A2AAgentToolInput":
-        if self.message or self.payload:
-            return self
+    @model_validator(mode="before")
+    @classmethod
+    def _ensure_any_input(cls, data: Any) -> Any:
+        if not isinstance(data, dict) or data.get("message") or data.get("payload"):
+            return data
         # 넘어온 기타 키들을 payload로 자동 흡수
-        extra = getattr(self, "__pydantic_extra__", None) or {}
-        reserved = {"message", "payload", "skill", "accepted_output_modes", "blocking", "timeout_sec"}
-        inferred = {k: v for k, v in extra.items() if k not in reserved}
+        inferred = {k: v for k, v in data.items() if k not in _RESERVED_INPUT_KEYS}
         if inferred:
-            self.payload = inferred
-            return self
+            rest = {k: v for k, v in data.items() if k in _RESERVED_INPUT_KEYS}
+            rest["payload"] = inferred
+            return rest
         raise ValueError("Either 'message' or 'payload' must be provided.")
 
 
+_RESERVED_INPUT_KEYS = frozenset(A2AAgentToolInput.model_fields)
+_INPUT_ADAPTER: TypeAdapter[A2AAgentToolInput] = TypeAdapter(A2AAgentToolInput)
+
+
 # ===========================
 # Utils
 # ===========================
 
-def _pick_last_agent_text(task: Optional[Task]) -> str:
-    if not task or not getattr(task, "history", None):
-        return ""
-    for m in reversed(task.history):
-        if getattr(m, "role", None) == Role.agent:
-            for p in getattr(m, "parts", []) or []:
-                root = getattr(p, "root", None)
-                if isinstance(root, TextPart) and getattr(root, "text", None):
-                    return root.text
-    return ""
+_ROLE_AGENT = Role.agent
+_ROLE_NAMES: Dict[Any, str] = {r: sys.intern(r.value) for r in Role}
+_EMPTY: Tuple[()] = ()
 
 
 def _compact_history(task: Optional[Task]) -> Tuple[str, List[Dict[str, Optional[str]]], Optional[str]]:
+    """history 요약과 마지막 agent 텍스트를 한 번의 순회로 추출."""
     if not task or not getattr(task, "history", None):
         return "", [], None
 
+    text_part = TextPart
+    role_agent = _ROLE_AGENT
+    role_names = _ROLE_NAMES
     history: List[Dict[str, Optional[str]]] = []
+    result_text = ""
     for m in task.history:
-        role_name = getattr(m.role, "value", str(m.role))
-        # parts 안의 TextPart만 이어 붙임
-        txt = "".join(
-            getattr(p.root, "text", "")
-            for p in (getattr(m, "parts", []) or [])
-            if isinstance(getattr(p, "root", None), TextPart)
-        ) or None
-        history.append({"role": role_name, "text": txt})
-
-    result_text = _pick_last_agent_text(task)
+        role = m.role
+        # parts 안의 TextPart만 이어 붙임(Part는 RootModel이라 root가 항상 존재)
+        texts = [p.root.text or "" for p in (m.parts or _EMPTY) if type(p.root) is text_part]
+        txt = ("".join(texts) or None) if texts else None
+        history.append({"role": role_names.get(role) or sys.intern(str(role)), "text": txt})
+        if role is role_agent:
+            # 마지막 agent 메시지 중 비어있지 않은 첫 TextPart
+            first = next((t for t in texts if t), None)
+            if first:
+                result_text = first
+
+    return result_text, history, _task_state(task)
+
+
+def _task_state(task: Task) -> Optional[str]:
     state = getattr(getattr(task, "status", None), "state", None)
-    task_state = getattr(state, "value", str(state)) if state else None
-    return result_text, history, task_state
+    return getattr(state, "value", str(state)) if state else None
+
+
+def _quick_state(task: Optional[Task]) -> Tuple[str, Optional[str]]:
+    """history를 만들지 않고 (마지막 agent 텍스트, task_state)만 추출. 뒤에서부터 찾고 바로 종료."""
+    if not task:
+        return "", None
+    text_part = TextPart
+    role_agent = _ROLE_AGENT
+    for m in reversed(getattr(task, "history", None) or _EMPTY):
+        if m.role is role_agent:
+            for p in m.parts or _EMPTY:
+                root = p.root
+                if type(root) is text_part and root.text:
+                    return root.text, _task_state(task)
+    return "", _task_state(task)
+
+
+_HISTORY_HEAD = 2
+
+
+def _bound_history(
+    history: List[Dict[str, Optional[str]]], max_history: int
+) -> Tuple[List[Dict[str, Optional[str]]], bool]:
+    """history가 max_history를 넘으면 앞 2개 + 생략 표시 + 마지막 항목들만 남긴다."""
+    if len(history) <= max_history:
+        return history, False
+    tail = max_history - _HISTORY_HEAD - 1
+    omitted = len(history) - _HISTORY_HEAD - tail
+    marker = {"role": "system", "text": f"... {omitted} messages omitted ..."}
+    # tail이 0일 수 있으므로 history[-tail:] 대신 시작 인덱스로 자름 (-0은 전체 목록)
+    return [*history[:_HISTORY_HEAD], marker, *history[len(history) - tail:]], True
+
+
+def _fmt_airbnb_search(payload: Dict[str, Any]) -> Optional[str]:
+    loc = payload.get("location")
+    checkin = payload.get("checkin")
+    checkout = payload.get("checkout")
+    adults = payload.get("adults")
+    if loc and checkin and checkout and adults:
+        return f"Please find a room in {loc}, {checkin}, checkout date is {checkout}, {adults} adults"
+    return None
+
+
+# 스킬명(소문자) → 포맷터. None을 반환하면 기본 JSON 문자열로 대체
+_SKILL_FORMATTERS: Dict[str, Callable[[Dict[str, Any]], Optional[str]]] = {
+    "airbnb_search": _fmt_airbnb_search,
+}
 
 
 def _format_payload_to_message(skill: Optional[str], payload: Dict[str, Any]) -> str:
-    """스킬별 포맷팅(필요 시 추가) → 기본은 JSON 문자열."""
-    if (skill or "").lower() == "airbnb_search":
-        loc = payload.get("location")
-        checkin = payload.get("checkin")
-        checkout = payload.get("checkout")
-        adults = payload.get("adults")
-        if loc and checkin and checkout and adults:
-            return f"Please find a room in {loc}, {checkin}, checkout date is {checkout}, {adults} adults"
-    return json.dumps(payload, ensure_ascii=False)
+    """스킬별 포맷팅(_SKILL_FORMATTERS에 추가) → 기본은 JSON 문자열."""
+    fmt = _SKILL_FORMATTERS.get(skill.lower()) if skill else None
+    return (fmt(payload) if fmt else None) or _dumps(payload)
+
+
+@functools.lru_cache(maxsize=32)
+def _cfg_for(accepted_output_modes: Tuple[str, ...], blocking: bool) -> MessageSendConfiguration:
+    """동일한 (출력모드, blocking) 조합의 설정 객체 재사용(읽기 전용으로만 사용)."""
+    return MessageSendConfiguration(acceptedOutputModes=list(accepted_output_modes), blocking=blocking)
+
+
+# ===========================
+# Shared HTTP clients
+# ===========================
+# httpx.AsyncClient의 커넥션 풀은 생성된 이벤트 루프에 묶이므로 루프별로 보관한다.
+# 루프가 사라지면 해당 루프의 클라이언트도 함께 정리된다.
+_ClientKey = Tuple[str, FrozenSet[Tuple[str, str]]]
+_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[_ClientKey, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _endpoint_key(endpoint: AgentEndpoint) -> _ClientKey:
+    return endpoint.url, frozenset((endpoint.headers or {}).items())
+
+
+def _get_client(endpoint: AgentEndpoint) -> httpx.AsyncClient:
+    """(url, headers) 단위로 재사용되는 AsyncClient 반환. 타임아웃은 요청마다 지정한다."""
+    loop = asyncio.get_running_loop()
+    clients = _CLIENTS.setdefault(loop, {})
+    key = _endpoint_key(endpoint)
+    client = clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=_HTTP2,
+            headers=endpoint.headers or None,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+        clients[key] = client
+    return client
+
+
+async def aclose_clients() -> None:
+    """현재 이벤트 루프에서 생성된 공유 클라이언트를 모두 종료."""
+    clients = _CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+# 진행 중인 AgentCard 조회(루프별). 같은 (url, headers)의 동시 조회는 하나의 Future를 공유한다.
+_CARD_INFLIGHT: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[_ClientKey, asyncio.Future]]" = (
+    weakref.WeakKeyDictionary()
+)
 
 
 async def _fetch_agent_card(endpoint: AgentEndpoint, timeout_sec: int) -> Optional[Any]:
+    """single-flight 조회. AgentCard GET은 멱등이므로 동시 요청을 하나로 합쳐도 안전하다."""
+    inflight = _CARD_INFLIGHT.setdefault(asyncio.get_running_loop(), {})
+    key = _endpoint_key(endpoint)
+    fut = inflight.get(key)
+    if fut is None:
+        fut = asyncio.ensure_future(_request_agent_card(endpoint, timeout_sec))
+        inflight[key] = fut
+        fut.add_done_callback(lambda _f, key=key: inflight.pop(key, None))
+    # 한 호출자가 취소되어도 공유 조회는 계속되도록 shield
+    return await asyncio.shield(fut)
+
+
+async def _request_agent_card(endpoint: AgentEndpoint, timeout_sec: int) -> Optional[Any]:
     try:
-        async with httpx.AsyncClient(timeout=timeout_sec, headers=endpoint.headers or None) as c:
-            resolver = A2ACardResolver(httpx_client=c, base_url=endpoint.url)
-            return await resolver.get_agent_card()
+        resolver = A2ACardResolver(httpx_client=_get_client(endpoint), base_url=endpoint.url)
+        return await resolver.get_agent_card(http_kwargs={"timeout": timeout_sec})
     except Exception as e:
-        logger.debug("AgentCard 조회 실패: %s", e)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("AgentCard 조회 실패(%s): %s", endpoint.url, e)
         return None
 
 
-def _build_description(prefix: str, card: Optional[Any]) -> str:
-    lines = [
-        prefix,
-        "",
-        "⚠️ 중요: 아래 예시는 형식 참고용입니다. 현재 작업의 실데이터를 입력하세요.",
-        "예시의 위치/날짜/인원을 그대로 쓰지 마세요.",
-        "",
-    ]
+# ===========================
+# Background loop (sync → async bridge)
+# ===========================
+# 동기 _run 호출은 전용 스레드에서 계속 도는 루프 하나에서 실행한다.
+# 호출마다 루프를 생성/종료하지 않으므로 공유 클라이언트의 커넥션 풀도 유지된다.
+_BG_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_BG_LOCK = threading.Lock()
+
+
+def _get_bg_loop() -> asyncio.AbstractEventLoop:
+    global _BG_LOOP
+    with _BG_LOCK:
+        if _BG_LOOP is None or _BG_LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="a2a-tool-loop", daemon=True).start()
+            _BG_LOOP = loop
+        return _BG_LOOP
+
+
+# ===========================
+# AgentCard cache
+# ===========================
+# 엔드포인트별 (조회 시각, card, description). 조회 실패(None)는 캐시하지 않는다.
+_CARD_TTL_SEC = 300.0
+_CARD_CACHE: Dict[_ClientKey, Tuple[float, Any, str]] = {}
+
+
+def _cached_card(key: _ClientKey) -> Optional[Tuple[Any, str]]:
+    entry = _CARD_CACHE.get(key)
+    if entry and time.monotonic() - entry[0] < _CARD_TTL_SEC:
+        return entry[1], entry[2]
+    return None
+
+
+async def _resolve_card_and_description(
+    endpoint: AgentEndpoint, prefix: str, timeout_sec: int
+) -> Tuple[Optional[Any], str]:
+    """TTL 캐시 우선 조회. 같은 엔드포인트의 동시 생성은 _fetch_agent_card에서 한 번의 조회로 합쳐진다."""
+    key = _endpoint_key(endpoint)
+    hit = _cached_card(key)
+    if hit:
+        return hit
+
+    card = await _fetch_agent_card(endpoint, timeout_sec)
+    hit = _cached_card(key)  # 함께 기다린 다른 호출자가 이미 캐시했을 수 있음
+    if hit:
+        return hit
+    description = _build_description(prefix, card)
+    if card is not None:
+        _CARD_CACHE[key] = (time.monotonic(), card, description)
+    return card, description
+
+
+_DESC_NOTICE_LINES: Tuple[str, ...] = (
+    "",
+    "⚠️ 중요: 아래 예시는 형식 참고용입니다. 현재 작업의 실데이터를 입력하세요.",
+    "예시의 위치/날짜/인원을 그대로 쓰지 마세요.",
+    "",
+)
+_DESC_NO_CARD_LINE = "(참고: AgentCard 조회 실패로 스킬 정보가 표시되지 않습니다.)"
+_DESC_SUFFIX_LINES: Tuple[str, ...] = (
+    "\n💡 사용 시 주의사항:",
+    "   - message 또는 payload 형태로 입력 가능",
+    "   - 허용 출력모드(accepted_output_modes)를 명시하면 멀티 모달 처리 가능",
+    "   - 상태만 필요하면(예: blocking=False) include_history=False로 history 생략 가능",
+)
+
 
+def _build_description(prefix: str, card: Optional[Any]) -> str:
     if not card:
-        lines.append("(참고: AgentCard 조회 실패로 스킬 정보가 표시되지 않습니다.)")
-        return "\n".join(lines)
-
-    title = f"[Agent] {getattr(card, 'name', '')}"
-    if getattr(card, "version", None):
-        title += f" (v{card.version})"
-    lines.append(title)
-    if getattr(card, "description", None):
-        lines.append(f"- {card.description}")
-    if getattr(card, "url", None):
-        lines.append(f"- URL: {card.url}")
+        return "\n".join((prefix, *_DESC_NOTICE_LINES, _DESC_NO_CARD_LINE))
 
-    lines.append("\n[사용 가능한 Skills]")
+    name = getattr(card, "name", "")
+    version = getattr(card, "version", None)
+    card_desc = getattr(card, "description", None)
+    card_url = getattr(card, "url", None)
     skills = getattr(card, "skills", None) or []
+
+    lines = [prefix, *_DESC_NOTICE_LINES]
+    lines.append(f"[Agent] {name} (v{version})" if version else f"[Agent] {name}")
+    if card_desc:
+        lines.append(f"- {card_desc}")
+    if card_url:
+        lines.append(f"- URL: {card_url}")
+
+    lines.append("\n[사용 가능한 Skills]")
     if not skills:
         lines.append("(스킬 정보 없음)")
     else:
         for idx, s in enumerate(skills, 1):
             skill_name = getattr(s, "name", "(no name)")
-            lines.append(f"\n{idx}. Skill: {skill_name}")
             sd = getattr(s, "description", None)
+            exs = getattr(s, "examples", None)
+            lines.append(f"\n{idx}. Skill: {skill_name}")
             if sd:
                 lines.append(f"   설명: {sd}")
-            exs = getattr(s, "examples", None)
             if exs:
                 lines.append("   사용 예시 (참고용, 반드시 문맥에 맞게 수정):")
                 if isinstance(exs, str):
                     lines.append(f"      - {exs}")
                 elif isinstance(exs, list):
-                    for e in exs:
-                        lines.append(f"      - {e}")
-
-    lines += [
-        "\n💡 사용 시 주의사항:",
-        "   - message 또는 payload 형태로 입력 가능",
-        "   - 허용 출력모드(accepted_output_modes)를 명시하면 멀티 모달 처리 가능",
-    ]
+                    lines.extend(f"      - {e}" for e in exs)
+
+    lines.extend(_DESC_SUFFIX_LINES)
     return "\n".join(lines)
 
 
 # ===========================
 # Tool
 # ===========================
+_TOOL_DESC_PREFIX = "다른 에이전트에 요청을 보내는 A2A 기반의 툴입니다."
+
+
 class A2AAgentTool(BaseTool):
     """A2A 기반으로 다른 에이전트에 메시지를 보내는 CrewAI Tool."""
 
@@ -192,94 +388,111 @@ class A2AAgentTool(BaseTool):
         name: Optional[str] = None,
         timeout_sec: int = 60,
     ) -> "A2AAgentTool":
-        """엔드포인트만 받아 툴을 구성. 클라이언트는 매 호출 시 생성/종료.
+        """엔드포인트만 받아 툴을 구성. HTTP 클라이언트는 (url, headers) 단위로 공유.
         동기/비동기 이중 구현을 피하기 위해 비동기 본체만 유지하고,
         동기 컨텍스트에서 호출되면 내부에서 안전히 실행한다.
         """
+        _, description = await _resolve_card_and_description(endpoint, _TOOL_DESC_PREFIX, timeout_sec)
+        return cls._build(endpoint, name, description)
+
+    @classmethod
+    async def create_many(
+        cls,
+        specs: List[Tuple[AgentEndpoint, Optional[str], int]],
+        return_exceptions: bool = False,
+    ) -> List[Union["A2AAgentTool", BaseException]]:
+        """(endpoint, name, timeout_sec) 목록으로 여러 툴을 구성. AgentCard 조회는 동시에 수행하고 순서는 유지.
+        return_exceptions=True면 실패한 항목 자리에 예외 객체를 넣어 나머지 툴은 그대로 반환한다."""
+        resolved = await asyncio.gather(
+            *(_resolve_card_and_description(ep, _TOOL_DESC_PREFIX, t) for ep, _, t in specs),
+            return_exceptions=return_exceptions,
+        )
+        return [
+            res if isinstance(res, BaseException) else cls._build(ep, name, res[1])
+            for (ep, name, _), res in zip(specs, resolved)
+        ]
+
+    @classmethod
+    def _build(cls, endpoint: AgentEndpoint, name: Optional[str], description: str) -> "A2AAgentTool":
         tool = cls()
         tool._endpoint = endpoint
         if name:
             tool.name = name
-
-        card = await _fetch_agent_card(endpoint, timeout_sec)
-        tool.description = _build_description(
-            "다른 에이전트에 요청을 보내는 A2A 기반의 툴입니다.",
-            card,
-        )
+        tool.description = description
         return tool
 
     # -----------------------
     # Public entrypoint (single path)
     # -----------------------
     async def _arun(self, **kwargs) -> str:  # CrewAI 표준 비동기 진입점
-        params = self.args_schema(**kwargs) if not isinstance(kwargs, self.args_schema) else kwargs
+        return await self._arun_model(_INPUT_ADAPTER.validate_python(kwargs))
 
+    async def _arun_model(self, params: A2AAgentToolInput) -> str:
+        """검증이 끝난 입력 모델로 실행(재검증 없음)."""
         message = params.message
         payload = params.payload
         skill = params.skill
-        accepted_output_modes = params.accepted_output_modes or ["text"]
+        accepted_output_modes = params.accepted_output_modes or _DEFAULT_OUTPUT_MODES
         blocking = params.blocking
         timeout_sec = params.timeout_sec
 
         if not message and payload is not None:
             message = _format_payload_to_message(skill, payload)
         elif not message and payload is None:
-            return json.dumps({"error": "Either 'message' or 'payload' is required."}, ensure_ascii=False)
+            return _dumps({"error": "Either 'message' or 'payload' is required."})
 
+        # message_id / request id: 한 번의 urandom 호출로 두 개의 128bit hex ID 생성
+        rb = os.urandom(32)
         a2a_msg = Message(
-            message_id=str(uuid.uuid4()),
+            message_id=rb[:16].hex(),
             parts=[Part(root=TextPart(text=message, kind="text"))],
             role=Role.user,
         )
-        req = SendMessageRequest(
-            id=str(uuid.uuid4()),
+        # 내부에서 만든 신뢰 가능한 값만 담으므로 바깥 요청 모델은 검증을 생략
+        req = SendMessageRequest.model_construct(
+            id=rb[16:].hex(),
             params=MessageSendParams(
                 message=a2a_msg,
-                configuration=MessageSendConfiguration(
-                    acceptedOutputModes=accepted_output_modes,
-                    blocking=blocking,
-                ),
+                configuration=_cfg_for(accepted_output_modes, blocking),
             ),
         )
 
         try:
-            async with httpx.AsyncClient(timeout=timeout_sec, headers=self._endpoint.headers or None) as httpx_client:
-                client = A2AClient(httpx_client=httpx_client, url=self._endpoint.url)
-                resp = await client.send_message(req)
-                task = getattr(getattr(resp, "root", None), "result", None)
-                result_text, history, task_state = _compact_history(task)
-                return json.dumps(
-                    {
-                        "result": result_text,
-                        "meta": {"task_state": task_state, "history": history},
-                    },
-                    ensure_ascii=False,
-                )
+            client = A2AClient(httpx_client=_get_client(self._endpoint), url=self._endpoint.url)
+            resp = await client.send_message(req, http_kwargs={"timeout": timeout_sec})
+            task = getattr(getattr(resp, "root", None), "result", None)
+            if not params.include_history:
+                result_text, task_state = _quick_state(task)
+                return _dumps({"result": result_text, "meta": {"task_state": task_state}})
+            result_text, history, task_state = _compact_history(task)
+            history, truncated = _bound_history(history, params.max_history)
+            meta: Dict[str, Any] = {"task_state": task_state, "history": history}
+            if truncated:
+                meta["truncated"] = True
+            return _dumps({"result": result_text, "meta": meta})
         except httpx.ConnectError as e:
-            logger.info("Endpoint 연결 실패(%s): %s", self._endpoint.url, e)
-            return json.dumps(
+            # 엔드포인트가 불안정할 때 반복되는 경로이므로 비활성 레벨이면 인자 준비도 생략
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Endpoint 연결 실패(%s): %s", self._endpoint.url, e)
+            return _dumps(
                 {
                     "result": "",
                     "meta": {"task_state": "simulated", "note": f"Endpoint 연결 실패: {self._endpoint.url}"},
                     "error": str(e),
-                },
-                ensure_ascii=False,
+                }
             )
         except Exception as e:  # 모든 예외를 구조화
             logger.exception("A2A 호출 실패")
-            return json.dumps({"error": f"{type(e).__name__}: {e}"}, ensure_ascii=False)
+            return _dumps({"error": f"{type(e).__name__}: {e}"})
 
     # CrewAI가 동기 호출만 지원하는 실행 경로에서도 사용 가능하도록 thin wrapper 제공
     def _run(self, **kwargs) -> str:  # noqa: D401
-        """동기 컨텍스트에서 안전하게 비동기 본체 실행."""
+        """동기 컨텍스트에서 안전하게 비동기 본체 실행(백그라운드 루프에 위임)."""
+        params = _INPUT_ADAPTER.validate_python(kwargs)
+        fut = asyncio.run_coroutine_threadsafe(self._arun_model(params), _get_bg_loop())
         try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = None
-
-        if loop and loop.is_running():
-            # 이미 이벤트 루프가 돌고 있으면 그 루프에 태스크로 붙임
-            return asyncio.run_coroutine_threadsafe(self._arun(**kwargs), loop).result()
-
-        # 루프가 없으면 새로 생성하여 실행
-        return asyncio.run(self._arun(**kwargs))
+            # httpx 요청 타임아웃이 먼저 동작하도록 약간의 여유를 둔다
+            return fut.result(timeout=params.timeout_sec + 5)
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            return _dumps({"error": f"TimeoutError: A2A 호출이 {params.timeout_sec}s 내에 완료되지 않았습니다."})
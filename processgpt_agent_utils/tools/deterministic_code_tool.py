@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import ast
 import asyncio
+import copy
+import functools
+import hashlib
 import json
+import operator
 import os
+import re
 import sys
 import subprocess
-import tempfile
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Type
 
@@ -28,52 +37,84 @@ try:
 except Exception:
     McpClient = None  # type: ignore
 
+try:  # orjson이 있으면 JSON 인코딩/디코딩에 사용 (없으면 표준 json)
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj: Any, *, sort_keys: bool = False, default: Any = None) -> str:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option, default=default).decode()
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any, *, sort_keys: bool = False, default: Any = None) -> str:
+        return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, default=default)
+
+
+# LLM 응답의 ```json 코드 펜스 제거용 패턴
+_FENCE_START_RE = re.compile(r'^```(?:json)?\s*\n', re.MULTILINE)
+_FENCE_END_RE = re.compile(r'\n```\s*$', re.MULTILINE)
+
+# SQL 문자열에서 파라미터 후보를 뽑는 패턴 (fallback 추출에서 인자마다 재사용)
+_SET_RE = re.compile(r"SET\s+(\w+)\s*=\s*(\d+)", re.IGNORECASE)
+_EQ_STR_RE = re.compile(r"(\w+)\s*=\s*'([^']+)'", re.IGNORECASE)
+_SQL_KEYWORDS = frozenset({"SELECT", "FROM", "WHERE", "SET", "UPDATE", "INSERT", "DELETE"})
+
+
+def _scan_sql_params(text: str, params: Dict[str, Dict[str, Any]]) -> None:
+    """SQL 문자열에서 `SET col=<int>` / `col='<str>'` 후보를 params에 추가(먼저 나온 항목 우선).
+    두 패턴 모두 '='가 필요하므로 '='가 없는 문자열은 정규식 실행 없이 건너뛴다."""
+    if "=" not in text:
+        return
+    for m in _SET_RE.finditer(text):
+        col = m.group(1)
+        params.setdefault(col, {"name": col, "type": "integer", "example": int(m.group(2))})
+    for m in _EQ_STR_RE.finditer(text):
+        col = m.group(1)
+        if col.upper() not in _SQL_KEYWORDS:
+            params.setdefault(col, {"name": col, "type": "string", "example": m.group(2)})
+
 
 def _prepare_events_for_llm(steps: List[Dict[str, Any]]) -> str:
     compact = [{"tool": s["tool_name"], "args": s["args"]} for s in steps]
-    return json.dumps(compact, ensure_ascii=False)
+    return _dumps(compact)
+
+# JSON 스칼라 타입 → 파라미터 타입 (bool은 int의 하위 클래스이므로 type()으로 정확히 구분)
+_PARAM_TYPES: Dict[type, str] = {bool: "boolean", int: "integer", float: "number", str: "string"}
+
+
+def _infer_params_from_steps(steps: List[Dict[str, Any]], include_boolean: bool) -> Dict[str, Any]:
+    """스칼라 인자와 SQL 문자열에서 파라미터/바인딩을 한 번의 순회로 추론.
+    스칼라(비 bool) 인자는 모두 자신의 이름으로 파라미터가 되므로 `${arg}` 템플릿으로 바인딩한다."""
+    # 스칼라 인자만 (tool, arg, value, type) 평탄 목록으로 한 번에 걸러낸 뒤 순회
+    type_of = _PARAM_TYPES.get
+    scalars = [
+        (s.get("tool_name"), arg_name, arg_value, ptype)
+        for s in steps
+        for arg_name, arg_value in (s.get("args") or {}).items()
+        if (ptype := type_of(type(arg_value))) is not None
+    ]
 
-def _llm_fallback_regex(steps: List[Dict[str, Any]]) -> Dict[str, Any]:
-    import re
     params: Dict[str, Dict[str, Any]] = {}
     bindings: List[Dict[str, Any]] = []
-    for s in steps:
-        tool_name = s.get("tool_name")
-        args = s.get("args") or {}
-        for arg_name, arg_value in args.items():
-            if isinstance(arg_value, (str, int, float, bool)):
-                if isinstance(arg_value, bool):
-                    param_type = "boolean"
-                elif isinstance(arg_value, int):
-                    param_type = "integer"
-                elif isinstance(arg_value, float):
-                    param_type = "number"
-                else:
-                    param_type = "string"
-                params.setdefault(arg_name, {"name": arg_name, "type": param_type, "example": arg_value})
-            if isinstance(arg_value, str) and len(arg_value) > 10:
-                for m in re.finditer(r"SET\s+(\w+)\s*=\s*(\d+)", arg_value, re.IGNORECASE):
-                    col_name = m.group(1)
-                    value = int(m.group(2))
-                    params.setdefault(col_name, {"name": col_name, "type": "integer", "example": value})
-                for m in re.finditer(r"(\w+)\s*=\s*'([^']+)'", arg_value, re.IGNORECASE):
-                    col_name = m.group(1)
-                    value = m.group(2)
-                    if col_name.upper() not in ["SELECT", "FROM", "WHERE", "SET", "UPDATE", "INSERT", "DELETE"]:
-                        params.setdefault(col_name, {"name": col_name, "type": "string", "example": value})
-        for arg_name, arg_value in args.items():
-            if isinstance(arg_value, (str, int, float)) and not isinstance(arg_value, bool):
-                if isinstance(arg_value, str):
-                    tpl = arg_value
-                    for param_name, info in params.items():
-                        if param_name == arg_name:
-                            tpl = f"${{{param_name}}}"
-                    if tpl != arg_value:
-                        bindings.append({"tool": tool_name, "arg": arg_name, "mode": "template", "template": tpl})
-                else:
-                    bindings.append({"tool": tool_name, "arg": arg_name, "mode": "template", "template": f"${{{arg_name}}}"})
+    add_param = params.setdefault
+    add_binding = bindings.append
+    for tool_name, arg_name, arg_value, ptype in scalars:
+        if ptype == "boolean":
+            if include_boolean:
+                add_param(arg_name, {"name": arg_name, "type": ptype, "example": arg_value})
+            continue
+        add_param(arg_name, {"name": arg_name, "type": ptype, "example": arg_value})
+        if ptype == "string" and len(arg_value) > 10:
+            _scan_sql_params(arg_value, params)
+        add_binding({"tool": tool_name, "arg": arg_name, "mode": "template", "template": f"${{{arg_name}}}"})
     return {"parameters": list(params.values()), "bindings": bindings}
 
+
+def _llm_fallback_regex(steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return _infer_params_from_steps(steps, include_boolean=True)
+
 _prompt_template = """Extract dynamic values as parameters and templatize with ${{var}}.
 
 Rules:
@@ -99,53 +140,62 @@ Tools:
 
 JSON:"""
 
-def _suggest_parameters_via_llm(steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+@functools.lru_cache(maxsize=4)
+def _cached_llm(model: str, temperature: float, streaming: bool) -> Any:
+    from llm_factory import create_llm
+    return create_llm(model=model, streaming=streaming, temperature=temperature)
+
+
+def _get_llm(model: str = "gpt-4o", temperature: float = 0, streaming: bool = False) -> Optional[Any]:
+    """설정별 LLM 인스턴스를 한 번만 만들어 재사용(HTTP 연결/인증 재사용).
+    생성 실패(자격 증명 없음 등)는 캐시하지 않고 None을 반환한다."""
     try:
-        from llm_factory import create_llm
-        model = create_llm(model="gpt-4o", streaming=False, temperature=0)
+        return _cached_llm(model, temperature, streaming)
     except Exception:
-        model = None
+        return None
+
+
+# steps 지문 → LLM이 제안한 binding spec (프로세스 로컬 LRU, fallback 결과는 저장하지 않음)
+_BINDING_SPEC_CACHE_SIZE = 512
+_binding_spec_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _steps_fingerprint(steps: List[Dict[str, Any]]) -> str:
+    canonical = _dumps(steps, sort_keys=True, default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _suggest_parameters_via_llm(steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    fingerprint = _steps_fingerprint(steps)
+    cached = _binding_spec_cache.get(fingerprint)
+    if cached is not None:
+        _binding_spec_cache.move_to_end(fingerprint)
+        return copy.deepcopy(cached)
+
+    model = _get_llm()
 
     try:
-        import re
         prompt = _prompt_template.format(events=_prepare_events_for_llm(steps))
         if model is None:
             raise RuntimeError("LLM not available")
         response = model.invoke(prompt)
         if isinstance(response, dict):
-            return response
-        response_str = str(response)
-        if hasattr(response, 'content'):
-            response_str = response.content
-        return json.loads(response_str)
+            spec = response
+        else:
+            response_str = str(response)
+            if hasattr(response, 'content'):
+                response_str = response.content
+            spec = _loads(response_str)
     except Exception:
         return _llm_fallback_regex(steps)
 
-def _extract_parameters_from_query(query: Any, param_spec: List[Dict[str, Any]], model: Optional[Any] = None) -> Dict[str, Any]:
-    # 파라미터가 없으면 빈 딕셔너리 반환
-    if not param_spec:
-        return {}
-    
-    # LLM 없이 간단한 매핑 시도 (워크아이템 데이터가 이미 올바른 JSON인 경우)
-    if model is None:
-        if isinstance(query, dict):
-            result = {}
-            for p in param_spec:
-                param_name = p["name"]
-                if param_name in query:
-                    result[param_name] = query[param_name]
-            if result:
-                return result
-        # 매핑 실패 시 빈 딕셔너리
-        return {}
-    
-    # LLM으로 추출
-    try:
-        import re
-        extract_workitem_prompt = """Extract param values from workitem. Analyze Description/Instruction, compute if needed.
+    _binding_spec_cache[fingerprint] = copy.deepcopy(spec)
+    if len(_binding_spec_cache) > _BINDING_SPEC_CACHE_SIZE:
+        _binding_spec_cache.popitem(last=False)
+    return spec
 
-Params: {param_spec}
-Data: {query}
+# 고정 지시문/예시를 앞에, 호출마다 달라지는 값은 맨 뒤에 둔다(프로바이더 prefix 캐시 재사용).
+_extract_workitem_prompt = """Extract param values from workitem. Analyze Description/Instruction, compute if needed.
 
 Rules:
 - Understand Description/Instruction, infer values
@@ -157,12 +207,127 @@ Output JSON: {{"param":value}}
 Ex1: "Laptop stock 40" → {{"product_name":"Laptop","stock_quantity":40}}
 Ex2: [Inst]stock-order subtract [Input]curr=100,ord=10 → {{"stock_quantity":90}}
 
+Params: {param_spec}
+Data: {query}
+
 JSON:"""
 
+_ARITH_OPS: Dict[type, Any] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+
+def _eval_param_expr(expr: str, values: Dict[str, Any]) -> Any:
+    """파라미터 spec의 "expr"(예: "curr - ord")을 values 기준으로 계산. 사칙연산/숫자/이름만 허용."""
+    def _ev(node: ast.AST) -> Any:
+        if isinstance(node, ast.Expression):
+            return _ev(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.Name):
+            return values[node.id]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -_ev(node.operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITH_OPS:
+            return _ARITH_OPS[type(node.op)](_ev(node.left), _ev(node.right))
+        raise ValueError(f"unsupported expression: {expr}")
+    return _ev(ast.parse(expr, mode="eval"))
+
+
+def _coerce_value(value: Any, param_type: Optional[str]) -> Any:
+    """선언 타입으로 값 변환. "90.0", "1,000" 같은 입력도 허용하고, 변환 불가 값은 그대로 둔다."""
+    if param_type == "integer" and not isinstance(value, int):
+        try:
+            number = float(str(value).replace(",", ""))
+        except (ValueError, TypeError):
+            return value
+        return int(number) if number.is_integer() else value
+    if param_type == "number" and not isinstance(value, (int, float)):
+        try:
+            return float(str(value).replace(",", ""))
+        except (ValueError, TypeError):
+            return value
+    if param_type == "boolean" and not isinstance(value, bool):
+        return bool(value)
+    if param_type == "string" and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def _coerce_params(values: Dict[str, Any], param_spec: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """param_spec에 선언된 파라미터만 골라 선언 타입으로 변환(None은 제외).
+    생성 코드의 캐스트와 별개로 실행 시점에 항상 수행한다(캐스트 이전에 저장된 코드도 타입 값을 받도록)."""
+    result = {}
+    for p in param_spec:
+        value = values.get(p["name"])
+        if value is not None:
+            result[p["name"]] = _coerce_value(value, p.get("type"))
+    return result
+
+
+def _params_from_structured_query(query: Any, param_spec: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """query가 dict(또는 JSON 객체 문자열)이고 모든 파라미터를 직접/expr로 채울 수 있으면 결과 반환, 아니면 None."""
+    if isinstance(query, str):
+        text = query.strip()
+        if not text.startswith("{"):
+            return None
+        try:
+            query = _loads(text)
+        except ValueError:
+            return None
+    if not isinstance(query, dict):
+        return None
+
+    values: Dict[str, Any] = {}
+    for p in param_spec:
+        name = p["name"]
+        if name in query:
+            values[name] = query[name]
+        elif p.get("expr"):
+            try:
+                values[name] = _eval_param_expr(p["expr"], query)
+            except (KeyError, ValueError, TypeError, SyntaxError, ZeroDivisionError):
+                return None
+        else:
+            return None
+    return _coerce_params(values, param_spec)
+
+
+def _extract_parameters_from_query(
+    query: Any,
+    param_spec: List[Dict[str, Any]],
+    model: Optional[Any] = None,
+    structured_checked: bool = False,
+) -> Dict[str, Any]:
+    # 파라미터가 없으면 빈 딕셔너리 반환
+    if not param_spec:
+        return {}
+    
+    # 워크아이템이 이미 모든 파라미터를 담은 JSON이면 LLM 없이 결정적으로 추출
+    # (호출자가 이미 _params_from_structured_query를 시도했다면 structured_checked=True로 생략)
+    if not structured_checked:
+        structured = _params_from_structured_query(query, param_spec)
+        if structured is not None:
+            return structured
+
+    # LLM 없이 간단한 매핑 시도 (워크아이템 데이터가 이미 올바른 JSON인 경우)
+    if model is None:
+        if isinstance(query, dict):
+            result = _coerce_params(query, param_spec)
+            if result:
+                return result
+        # 매핑 실패 시 빈 딕셔너리
+        return {}
+    
+    # LLM으로 추출
+    try:
         # 프롬프트 구성
-        prompt = extract_workitem_prompt.format(
-            param_spec=json.dumps(param_spec, ensure_ascii=False),
-            query=json.dumps(query, ensure_ascii=False) 
+        prompt = _extract_workitem_prompt.format(
+            param_spec=_dumps(param_spec),
+            query=_dumps(query) 
                 if not isinstance(query, str) else query
         )
         
@@ -171,58 +336,28 @@ JSON:"""
         
         # 응답 처리
         if isinstance(response, dict):
-            return response
+            return _coerce_params(response, param_spec)
         
         response_str = str(response)
         if hasattr(response, 'content'):
             response_str = response.content
         
-        # 코드 블록 제거
-        response_str = re.sub(r'^```(?:json)?\s*\n', '', response_str, flags=re.MULTILINE)
-        response_str = re.sub(r'\n```\s*$', '', response_str, flags=re.MULTILINE)
+        # 코드 블록 제거 (펜스가 있을 때만 정규식 실행)
+        if "```" in response_str:
+            response_str = _FENCE_START_RE.sub('', response_str)
+            response_str = _FENCE_END_RE.sub('', response_str)
         response_str = response_str.strip()
         
         # JSON 파싱
-        result = json.loads(response_str)
+        result = _loads(response_str)
         
-        # 타입 검증 및 변환
-        validated_result = {}
-        for p in param_spec:
-            param_name = p["name"]
-            param_type = p["type"]
-            value = result.get(param_name)
-            
-            if value is not None:
-                # 타입 변환
-                if param_type == "integer" and not isinstance(value, int):
-                    try:
-                        value = int(value)
-                    except (ValueError, TypeError):
-                        pass
-                elif param_type == "number" and not isinstance(value, (int, float)):
-                    try:
-                        value = float(value)
-                    except (ValueError, TypeError):
-                        pass
-                elif param_type == "boolean" and not isinstance(value, bool):
-                    value = bool(value)
-                elif param_type == "string" and not isinstance(value, str):
-                    value = str(value)
-                
-                validated_result[param_name] = value
-        
-        return validated_result
+        return _coerce_params(result, param_spec)
         
     except Exception as e:
         print(f"[WARN] 워크아이템 파라미터 추출 실패: {e}")
         # 실패 시 간단한 매핑 시도
         if isinstance(query, dict):
-            result = {}
-            for p in param_spec:
-                param_name = p["name"]
-                if param_name in query:
-                    result[param_name] = query[param_name]
-            return result
+            return _coerce_params(query, param_spec)
         return {}
 
 
@@ -242,20 +377,8 @@ class EventStep:
     args: Dict[str, Any]
 
 
-def _generate_form_data(form_id: str, result_content: str) -> Dict[str, Any]:
-    try:
-        from llm_factory import create_llm
-        model = create_llm(model="gpt-4o", streaming=False, temperature=0)
-    except Exception:
-        model = None
-    
-    form = fetch_form_by_id(form_id)
-    if not form:
-        raise RuntimeError(f"form '{form_id}' not found")
-    form_html = form.get("html")
-    form_fields = form.get("fields_json")
-
-    _form_template = """
+# 고정 규칙을 앞에, 폼/결과 입력값은 맨 뒤에 둔다(프로바이더 prefix 캐시 재사용).
+_form_template = """
 You are given a form definition and extracted content. Build a single JSON for form submission.
 
 [Goal]
@@ -275,11 +398,6 @@ You are given a form definition and extracted content. Build a single JSON for f
 - Do not invent fields. Do not include fields not present in form_fields.
 - The final output MUST be valid JSON and parseable with a standard JSON parser.
 
-[Inputs]
-- form_html: {form_html}
-- form_fields (JSON): {form_fields}
-- result_content (JSON or text): {result_content}
-
 [Notes]
 - Prefer values from result_content. Use form_html only to understand field meaning.
 - Common patterns: emails, names, dates (YYYY-MM-DD), and amounts (numbers possibly with commas and currency symbols).
@@ -287,16 +405,46 @@ You are given a form definition and extracted content. Build a single JSON for f
 
 [Validation]
 - Inside it, include exactly the keys listed in form_fields (order not important).
+
+[Inputs]
+- form_html: {form_html}
+- form_fields (JSON): {form_fields}
+- result_content (JSON or text): {result_content}
 """
 
+
+def _form_skeleton_keys(form_fields: Any) -> List[str]:
+    """폼 필드 정의(JSON 문자열 또는 리스트)에서 key 목록 추출."""
+    fields = _loads(form_fields) if isinstance(form_fields, str) else form_fields
+    return [f.get("key") for f in (fields or []) if isinstance(f, dict) and f.get("key")]
+
+
+def _form_skeleton(form_id: str, keys: List[str]) -> Dict[str, Any]:
+    # Default empty string values; specialize payment_method to "미정" if present
+    return {form_id: {k: ("미정" if k == "payment_method" else "") for k in keys}}
+
+
+def _generate_form_data(form_id: str, result_content: str, skeleton_keys: Optional[List[str]] = None) -> Dict[str, Any]:
+    """LLM으로 폼 데이터 생성. 실패하면 필드 key만 채운 skeleton 반환.
+    skeleton_keys(생성 시점에 미리 계산한 key 목록)가 있으면 LLM이 없을 때 폼 조회 없이 바로 반환한다."""
+    model = _get_llm()
+    if model is None and skeleton_keys is not None:
+        return _form_skeleton(form_id, skeleton_keys)
+
+    form = fetch_form_by_id(form_id)
+    if not form:
+        raise RuntimeError(f"form '{form_id}' not found")
+    form_html = form.get("html")
+    form_fields = form.get("fields_json")
+
     try:
         # Ensure clean JSON/text inputs for the prompt
         form_fields_str = (
-            json.dumps(form_fields, ensure_ascii=False)
+            _dumps(form_fields)
             if not isinstance(form_fields, str) else form_fields
         )
         result_content_str = (
-            json.dumps(result_content, ensure_ascii=False)
+            _dumps(result_content)
             if not isinstance(result_content, str) else result_content
         )
 
@@ -317,22 +465,13 @@ You are given a form definition and extracted content. Build a single JSON for f
         if hasattr(response, 'content'):
             response_str = response.content
  
-        return json.loads(response_str)
+        return _loads(response_str)
     except Exception:
-        # Fallback: build a skeleton using provided form_fields
+        # Fallback: build a skeleton using precomputed keys or provided form_fields
         try:
-            fields = form_fields
-            if isinstance(fields, str):
-                fields = json.loads(fields)
-            keys = [f.get("key") for f in (fields or []) if isinstance(f, dict) and f.get("key")]
-            # Default empty string values; specialize payment_method to "미정" if present
-            inner: Dict[str, str] = {}
-            for k in keys:
-                if k == "payment_method":
-                    inner[k] = "미정"
-                else:
-                    inner[k] = ""
-            return {form_id: inner}
+            if skeleton_keys is None:
+                skeleton_keys = _form_skeleton_keys(form_fields)
+            return _form_skeleton(form_id, skeleton_keys)
         except Exception:
             return {form_id: {}}
 
@@ -344,7 +483,13 @@ def _event_row_to_step(row: Dict[str, Any]) -> Optional[EventStep]:
     data_raw = row.get("data")
     if not data_raw:
         return None
-    data = json.loads(data_raw) if isinstance(data_raw, str) else data_raw
+    if isinstance(data_raw, str):
+        # tool_name 키가 없는 행은 디코딩하지 않고 건너뜀
+        if '"tool_name"' not in data_raw:
+            return None
+        data = _loads(data_raw)
+    else:
+        data = data_raw
     tool = data.get("tool_name")
     args = data.get("args") or {}
     if not tool:
@@ -356,7 +501,7 @@ def _event_row_to_step(row: Dict[str, Any]) -> Optional[EventStep]:
         query = args.get("query", "")
         if isinstance(query, str) and query.strip().upper().startswith("SELECT"):
             return None
-    return EventStep(tool_name=tool, args=args)
+    return EventStep(tool_name=sys.intern(tool), args=args)
 
 
 TEMPLATE = """# -*- coding: utf-8 -*-
@@ -366,12 +511,8 @@ import sys
 import json
 import asyncio
 from typing import Dict, Any, List
-from string import Template
 from fastmcp import Client
 
-def render(tpl: str, inputs: Dict[str, Any]) -> str:
-    return Template(tpl).substitute(inputs)
-
 def load_mcp_config() -> dict:
     \"\"\"환경 변수에서 MCP 설정을 로드합니다.\"\"\"
     mcp_config_str = os.environ.get("MCP_CONFIG")
@@ -379,20 +520,21 @@ def load_mcp_config() -> dict:
         raise RuntimeError("환경 변수 MCP_CONFIG가 설정되지 않았습니다.")
     return json.loads(mcp_config_str)
 
-async def _client_from_server_key(server_key: str) -> Client:
-    mcp_config = load_mcp_config()
-    server_config = mcp_config["mcpServers"][server_key]
-    # Client는 mcpServers 형식을 기대하므로 올바른 구조로 전달
-    config = {{"mcpServers": {{server_key: server_config}}}}
-    return Client(config)
-
-async def call_tool(server_key: str, tool_name: str, args: Dict[str, Any], timeout_s: int = 60):
-    client = await _client_from_server_key(server_key)
-    async with client:
-        await client.ping()
-        res = await asyncio.wait_for(client.call_tool(tool_name, args), timeout=timeout_s)
-        safe = json.loads(json.dumps(res.data, ensure_ascii=False, default=str))
-        return {{"tool": tool_name, "data": safe, "server": server_key}}
+# 서버 키별 Client를 모듈 전역에 보관해 설정 구성을 한 번만 수행
+_CLIENTS: Dict[str, Client] = {{}}
+
+def _client(server_key: str) -> Client:
+    client = _CLIENTS.get(server_key)
+    if client is None:
+        server_config = load_mcp_config()["mcpServers"][server_key]
+        # Client는 mcpServers 형식을 기대하므로 올바른 구조로 전달
+        client = _CLIENTS[server_key] = Client({{"mcpServers": {{server_key: server_config}}}})
+    return client
+
+async def call_tool(client: Client, server_key: str, tool_name: str, args: Dict[str, Any], timeout_s: int = 60):
+    res = await asyncio.wait_for(client.call_tool(tool_name, args), timeout=timeout_s)
+    safe = json.loads(json.dumps(res.data, ensure_ascii=False, default=str))
+    return {{"tool": tool_name, "data": safe, "server": server_key}}
 
 async def run(inputs: Dict[str, Any], timeout_s: int = 60) -> List[Dict[str, Any]]:
     \"\"\"
@@ -409,6 +551,9 @@ async def run(inputs: Dict[str, Any], timeout_s: int = 60) -> List[Dict[str, Any
 {param_docs}
     \"\"\"
     results = []
+    # 사용하는 서버마다 세션을 한 번만 열고 모든 툴 호출에서 재사용
+    async with {clients}:
+{pings}
 {steps}
     return results
 
@@ -453,85 +598,109 @@ if __name__ == "__main__":
         sys.exit(1)
 """
 
+def _template_to_expr(tpl: str, param_types: Optional[Dict[str, str]] = None) -> str:
+    """`${var}` 템플릿을 생성 시점에 파싱해 `"lit" + str(inputs["var"]) + ...` 식으로 변환.
+    string.Template.substitute와 같은 규칙($$ → $, $var/${var} 치환, 누락 키는 KeyError).
+    잘못된 `$` 사용은 문자 그대로 둔다.
+    param_types에 선언된 파라미터 하나로만 이루어진 템플릿(`${var}`)은 str()로 감싸지 않고
+    `inputs["var"]`를 그대로 넘긴다. 타입 변환은 실행 시점의 _coerce_params가 관대하게 수행하므로
+    생성 코드에는 int()/float() 같은 엄격한 캐스트를 넣지 않는다."""
+    param_types = param_types or {}
+    parts: List[str] = []
+    literal: List[str] = []
+
+    def _flush_literal() -> None:
+        text = "".join(literal)
+        literal.clear()
+        if text:
+            parts.append(json.dumps(text, ensure_ascii=False))
+
+    matches = list(Template.pattern.finditer(tpl))
+    if len(matches) == 1 and matches[0].span() == (0, len(tpl)):
+        name = matches[0].group("named") or matches[0].group("braced")
+        if name is not None and param_types.get(name) in ("integer", "number", "boolean"):
+            return f"inputs[{json.dumps(name)}]"
+
+    pos = 0
+    for m in matches:
+        literal.append(tpl[pos:m.start()])
+        pos = m.end()
+        name = m.group("named") or m.group("braced")
+        if name is not None:
+            _flush_literal()
+            parts.append(f"str(inputs[{json.dumps(name)}])")
+        elif m.group("escaped") is not None:
+            literal.append(Template.delimiter)
+        else:
+            literal.append(m.group(0))
+    literal.append(tpl[pos:])
+    _flush_literal()
+    return " + ".join(parts) if parts else '""'
+
+
 def _compile_steps_to_code(
     todo_id: str,
     steps: List[EventStep],
     tool_to_server: Dict[str, str],
     bindings: Dict[str, Any],
 ) -> str:
-    binding_map: Dict[tuple[str, str], Dict[str, Any]] = {}
+    # {tool: {arg: binding}} — 조회마다 (tool, arg) 튜플을 만들지 않도록 중첩 dict + 인턴 문자열 사용
+    binding_map: Dict[str, Dict[str, Dict[str, Any]]] = {}
     for b in (bindings.get("bindings") or []):
-        binding_map[(b["tool"], b["arg"])] = b
+        binding_map.setdefault(sys.intern(b["tool"]), {})[sys.intern(b["arg"])] = b
+
+    _no_bindings: Dict[str, Dict[str, Any]] = {}
+    param_types = {p["name"]: p.get("type") for p in (bindings.get("parameters") or []) if p.get("name")}
 
     lines: List[str] = []
+    client_vars: Dict[str, str] = {}
     for s in steps:
         server_key = tool_to_server.get(s.tool_name)
         if not server_key:
             raise ValueError(f"툴 '{s.tool_name}'를 제공하는 MCP 서버를 찾지 못했습니다.")
+        client_var = client_vars.get(server_key)
+        if client_var is None:
+            client_var = client_vars[server_key] = f"c{len(client_vars)}"
         rendered_parts = []
+        tool_bindings = binding_map.get(s.tool_name, _no_bindings)
         for k, v in s.args.items():
-            b = binding_map.get((s.tool_name, k))
+            b = tool_bindings.get(k)
             if b and b.get("mode") == "template":
                 tpl = b["template"]
-                rendered_parts.append(f'"{k}": render({json.dumps(tpl, ensure_ascii=False)}, inputs)')
+                rendered_parts.append(f'{json.dumps(k)}: {_template_to_expr(tpl, param_types)}')
             else:
-                rendered_parts.append(f'"{k}": {json.dumps(v, ensure_ascii=False)}')
+                # 고정 인자는 Python 리터럴로 그대로 박아 넣는다(true/false/null도 올바르게 표현)
+                rendered_parts.append(f'{json.dumps(k)}: {v!r}')
         arg_expr = "{ " + ", ".join(rendered_parts) + " }"
-        line = f'    results.append(await call_tool("{server_key}", "{s.tool_name}", {arg_expr}, timeout_s=timeout_s))'
+        line = (
+            f'        results.append(await call_tool({client_var}, {json.dumps(server_key)}, '
+            f'{json.dumps(s.tool_name)}, {arg_expr}, timeout_s=timeout_s))'
+        )
         lines.append(line)
 
+    clients = ", ".join(f"_client({json.dumps(key)}) as {var}" for key, var in client_vars.items())
+    pings = "\n".join(f"        await {var}.ping()" for var in client_vars.values())
+
     param_docs = []
     for p in bindings.get("parameters", []):
         param_docs.append(
             f'        - {p["name"]} ({p["type"]}): example={json.dumps(p.get("example"), ensure_ascii=False)}'
         )
     param_docs_str = "\n".join(param_docs) if param_docs else "        None"
-    return TEMPLATE.format(todo_id=todo_id, steps="\n".join(lines), param_docs=param_docs_str)
+    return TEMPLATE.format(
+        todo_id=todo_id,
+        clients=clients,
+        pings=pings,
+        steps="\n".join(lines),
+        param_docs=param_docs_str,
+    )
 
 
 def _fallback_parameter_suggestion(steps: List[Dict[str, Any]]) -> Dict[str, Any]:
-    import re
+    return _infer_params_from_steps(steps, include_boolean=False)
 
-    params: Dict[str, Dict[str, Any]] = {}
-    bindings: List[Dict[str, Any]] = []
-
-    for s in steps:
-        tool_name = s.get("tool_name")
-        args = s.get("args") or {}
-        for arg_name, arg_value in args.items():
-            if isinstance(arg_value, (str, int, float)):
-                if isinstance(arg_value, bool):
-                    continue
-                if isinstance(arg_value, int):
-                    ptype = "integer"
-                elif isinstance(arg_value, float):
-                    ptype = "number"
-                else:
-                    ptype = "string"
-                params.setdefault(arg_name, {"name": arg_name, "type": ptype, "example": arg_value})
-
-            if isinstance(arg_value, str) and len(arg_value) > 10:
-                for m in re.finditer(r"SET\s+(\w+)\s*=\s*(\d+)", arg_value, re.IGNORECASE):
-                    col, val = m.group(1), int(m.group(2))
-                    params.setdefault(col, {"name": col, "type": "integer", "example": val})
-                for m in re.finditer(r"(\w+)\s*=\s*'([^']+)'", arg_value, re.IGNORECASE):
-                    col, val = m.group(1), m.group(2)
-                    if col.upper() not in ["SELECT", "FROM", "WHERE", "SET", "UPDATE", "INSERT", "DELETE"]:
-                        params.setdefault(col, {"name": col, "type": "string", "example": val})
-
-        for arg_name, arg_value in args.items():
-            if isinstance(arg_value, (str, int, float)) and not isinstance(arg_value, bool):
-                if isinstance(arg_value, str):
-                    tpl = arg_value
-                    for param_name, info in params.items():
-                        if param_name == arg_name:
-                            tpl = f"${{{param_name}}}"
-                    if tpl != arg_value:
-                        bindings.append({"tool": tool_name, "arg": arg_name, "mode": "template", "template": tpl})
-                else:
-                    bindings.append({"tool": tool_name, "arg": arg_name, "mode": "template", "template": f"${{{arg_name}}}"})
+_TOOL_INDEX_CONCURRENCY = 8
 
-    return {"parameters": list(params.values()), "bindings": bindings}
 
 async def _build_tool_index(mcp_json: dict) -> tuple[Dict[str, str], Dict[str, Any], dict]:
     tool_to_server: Dict[str, str] = {}
@@ -542,16 +711,28 @@ async def _build_tool_index(mcp_json: dict) -> tuple[Dict[str, str], Dict[str, A
     if McpClient is None:
         return {}, {}, {"mcpServers": {k: {kk: vv for kk, vv in v.items() if kk != "enabled"} for k, v in enabled_servers.items()}}
 
-    for server_key, server_config in enabled_servers.items():
-        config = {"mcpServers": {server_key: server_config}}
-        client = McpClient(config)
-        async with client:
-            await client.ping()
-            tools = await client.list_tools()
-            for t in tools:
-                name = t.name
-                tool_to_server[name] = server_key
-            server_meta[server_key] = {"tools_count": len(tools)}
+    # 서버별 ping/list_tools는 서로 독립이므로 동시에 수행 (동시 연결 수는 제한)
+    sem = asyncio.Semaphore(_TOOL_INDEX_CONCURRENCY)
+
+    async def _index_one(server_key: str, server_config: dict) -> tuple[str, list]:
+        async with sem:
+            client = McpClient({"mcpServers": {server_key: server_config}})
+            async with client:
+                await client.ping()
+                return server_key, await client.list_tools()
+
+    pairs = await asyncio.gather(
+        *(_index_one(k, v) for k, v in enabled_servers.items()), return_exceptions=True
+    )
+    # 결과는 서버 순서대로 반영 (같은 툴 이름이면 뒤 서버가 우선 — 기존 순차 동작과 동일)
+    for server_key, pair in zip(enabled_servers, pairs):
+        if isinstance(pair, BaseException):
+            print(f"[WARN] MCP 서버 툴 조회 실패: {server_key}: {pair}")
+            continue
+        _, tools = pair
+        for t in tools:
+            tool_to_server[t.name] = server_key
+        server_meta[server_key] = {"tools_count": len(tools)}
 
     cleaned_servers = {}
     for server_key, server_config in enabled_servers.items():
@@ -561,32 +742,54 @@ async def _build_tool_index(mcp_json: dict) -> tuple[Dict[str, str], Dict[str, A
     return tool_to_server, server_meta, final_config
 
 
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_loop_lock = threading.Lock()
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """호출 스레드에 이미 루프가 돌고 있을 때 사용할 상주 백그라운드 루프(지연 생성)."""
+    global _worker_loop
+    with _worker_loop_lock:
+        if _worker_loop is None or _worker_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="deterministic-code-loop", daemon=True).start()
+            _worker_loop = loop
+        return _worker_loop
+
+
 def _run_coro_safely(coro: Any) -> Any:
     """Run coroutine from sync context even if an event loop is already running.
     - If no running loop: use asyncio.run
-    - If running loop exists: execute in a new thread with its own loop
+    - If running loop exists: submit to a persistent background loop thread
     """
     try:
         asyncio.get_running_loop()
     except RuntimeError:
         return asyncio.run(coro)
-    import threading, queue
-    q: "queue.Queue[tuple[bool, Any]]" = queue.Queue(maxsize=1)
-    def _runner() -> None:
-        try:
-            result = asyncio.run(coro)
-            q.put((True, result))
-        except Exception as e:  # noqa: BLE001
-            q.put((False, e))
-    t = threading.Thread(target=_runner, daemon=True)
-    t.start()
-    ok, val = q.get()
-    if ok:
-        return val
-    raise val
-
-
-async def _generate_code(tenant_id: str, todo_id: str, proc_def_id: str, activity_id: str) -> Dict[str, str | Dict[str, Any]]:
+    return asyncio.run_coroutine_threadsafe(coro, _get_worker_loop()).result()
+
+
+def _run_on_worker_loop(coro: Any) -> Any:
+    """코루틴을 항상 상주 백그라운드 루프에서 실행하고 결과를 기다림.
+    캐시된 생성 모듈의 _CLIENTS(fastmcp Client)가 한 루프에서만 쓰이도록 프로세스 내 실행은 이 경로만 사용한다."""
+    loop = _get_worker_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("cannot block on the deterministic-code loop from within itself")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def _generate_code(
+    tenant_id: str,
+    todo_id: str,
+    proc_def_id: str,
+    activity_id: str,
+    form_id: Optional[str] = None,
+) -> Dict[str, str | Dict[str, Any]]:
     mcp = fetch_tenant_mcp(tenant_id)
     if not mcp:
         raise RuntimeError(f"tenant '{tenant_id}'의 mcp 구성이 없습니다.")
@@ -610,6 +813,18 @@ async def _generate_code(tenant_id: str, todo_id: str, proc_def_id: str, activit
 
     code = _compile_steps_to_code(todo_id, steps, tool_to_server, bindings=binding_spec)
 
+    # 폼 스키마는 form_id별로 고정이므로 skeleton key를 생성 시점에 한 번 계산해 parameters에 함께 저장
+    if form_id:
+        try:
+            form = fetch_form_by_id(form_id)
+            if form:
+                binding_spec["form_skeleton"] = {
+                    "form_id": form_id,
+                    "keys": _form_skeleton_keys(form.get("fields_json")),
+                }
+        except Exception as e:
+            print(f"[WARN] 폼 skeleton 계산 실패: {e}")
+
     code_dict = {
         "code": code,
         "parameters": binding_spec,
@@ -621,7 +836,71 @@ async def _generate_code(tenant_id: str, todo_id: str, proc_def_id: str, activit
     return code_dict
 
 
-def _execute_code(tenant_id: str, todo_id: str, code_dict: Optional[Dict[str, str | Dict[str, Any]]] = None, use_compensation: bool = False) -> str:
+_CLI_MAIN_MARKER = '\nif __name__ == "__main__":'
+_GENERATED_MODULE_CACHE_SIZE = 256
+_generated_module_cache: "OrderedDict[str, types.ModuleType]" = OrderedDict()
+_generated_module_lock = threading.Lock()
+
+# 생성 코드를 별도 프로세스에서 실행할지 여부(신뢰할 수 없는 코드를 다루는 배포에서 켬)
+DETERMINISTIC_CODE_ISOLATE = os.getenv("DETERMINISTIC_CODE_ISOLATE", "").strip().lower() in ("1", "true", "yes")
+
+
+def _load_generated_module(code_str: str, mcp_config: dict) -> types.ModuleType:
+    """생성 코드를 현재 프로세스의 모듈로 로드하고 (코드, MCP 설정) 해시로 캐시.
+    같은 모듈을 재사용해야 모듈 전역 _CLIENTS가 호출 간에 유지된다(run()은 _run_on_worker_loop로만 실행).
+    설정을 키에 포함하므로 테넌트별 설정이 섞이지 않고, load_mcp_config 주입으로 os.environ도 건드리지 않는다."""
+    digest = hashlib.blake2b(code_str.encode("utf-8"), digest_size=16)
+    digest.update(_dumps(mcp_config, sort_keys=True).encode("utf-8"))
+    key = digest.hexdigest()
+    with _generated_module_lock:
+        module = _generated_module_cache.get(key)
+        if module is not None:
+            _generated_module_cache.move_to_end(key)
+            return module
+        # 프로세스 내 실행에서는 CLI 진입부(__main__ 블록)가 필요 없으므로 잘라내고 컴파일
+        source = code_str.split(_CLI_MAIN_MARKER, 1)[0]
+        # optimize=2: 생성 코드의 docstring/assert 제거 (실행 의미에는 영향 없음)
+        code_obj = compile(source, f"<generated:{key}>", "exec", optimize=2)
+        module = types.ModuleType(f"generated_{key}")
+        exec(code_obj, module.__dict__)
+        module.load_mcp_config = lambda: mcp_config
+        _generated_module_cache[key] = module
+        if len(_generated_module_cache) > _GENERATED_MODULE_CACHE_SIZE:
+            _generated_module_cache.popitem(last=False)
+        return module
+
+
+def _run_generated_subprocess(activity_code: str, mcp_config: dict, extracted_params: Dict[str, Any]) -> str:
+    """생성 코드를 별도 Python 프로세스에서 실행하고 stdout을 반환.
+    소스는 임시 파일 대신 stdin(`python -`)으로 전달한다."""
+    env = {**os.environ, "MCP_CONFIG": _dumps(mcp_config), "PYTHONIOENCODING": "utf-8"}
+    proc = subprocess.Popen(
+        [sys.executable, "-", _dumps(extracted_params)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+    out, err = proc.communicate(activity_code.encode("utf-8"))
+    stdout = out.decode("utf-8", errors="replace")
+    stderr = err.decode("utf-8", errors="replace")
+    if stderr and proc.returncode != 0:
+        raise RuntimeError(stderr.strip() or "generated code execution failed")
+    return stdout
+
+
+def _execute_code(
+    tenant_id: str,
+    todo_id: str,
+    code_dict: Optional[Dict[str, str | Dict[str, Any]]] = None,
+    use_compensation: bool = False,
+    isolate: Optional[bool] = None,
+) -> str:
+    """저장된 코드를 워크아이템 파라미터로 실행.
+    - 기본은 현재 프로세스에서 실행(인터프리터 기동/재import 비용 없음)
+    - isolate=True면 별도 Python 프로세스에서 실행(신뢰할 수 없는 코드용).
+      None이면 DETERMINISTIC_CODE_ISOLATE 환경 변수를 따른다.
+    """
     if code_dict is None:
         raise RuntimeError("code_dict is required; generate or fetch code before execution")
 
@@ -640,9 +919,10 @@ def _execute_code(tenant_id: str, todo_id: str, code_dict: Optional[Dict[str, st
     if not query:
         raise RuntimeError(f"워크아이템 {todo_id}에 query가 없습니다.")
 
-    from llm_factory import create_llm
-    model = create_llm(model="gpt-4o", streaming=False, temperature=0)
-    extracted_params = _extract_parameters_from_query(query, param_spec, model)
+    extracted_params = _params_from_structured_query(query, param_spec) if param_spec else {}
+    if extracted_params is None:
+        model = _get_llm()
+        extracted_params = _extract_parameters_from_query(query, param_spec, model, structured_checked=True)
 
     mcp = fetch_tenant_mcp(tenant_id)
     servers = (mcp or {}).get("mcpServers", {})
@@ -650,47 +930,45 @@ def _execute_code(tenant_id: str, todo_id: str, code_dict: Optional[Dict[str, st
     cleaned_servers = {k: {kk: vv for kk, vv in v.items() if kk != "enabled"} for k, v in enabled_servers.items()}
     mcp_config = {"mcpServers": cleaned_servers}
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
-        temp_file = f.name
-        f.write(activity_code)
+    # 폼 데이터 생성(LLM)은 추출된 파라미터에만 의존하므로 코드 실행과 동시에 진행
+    tool = workitem.get("tool") or ""
+    form_executor: Optional[ThreadPoolExecutor] = None
+    form_future = None
+    if tool.startswith('formHandler:'):
+        form_executor = ThreadPoolExecutor(max_workers=1)
+        form_id = tool.replace('formHandler:', '')
+        skeleton = code_dict.get("parameters", {}).get("form_skeleton") or {}
+        skeleton_keys = skeleton.get("keys") if skeleton.get("form_id") == form_id else None
+        form_future = form_executor.submit(_generate_form_data, form_id, extracted_params, skeleton_keys)
+
+    if isolate is None:
+        isolate = DETERMINISTIC_CODE_ISOLATE
 
     try:
-        env = os.environ.copy()
-        env["MCP_CONFIG"] = json.dumps(mcp_config, ensure_ascii=False)
-        input_json = json.dumps(extracted_params, ensure_ascii=False)
-        result = subprocess.run(
-            [sys.executable, temp_file, input_json],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-            env=env,
-        )
-        stdout = result.stdout or ""
-        stderr = result.stderr or ""
-        if stderr and result.returncode != 0:
-            raise RuntimeError(stderr.strip() or "generated code execution failed")
+        if isolate:
+            stdout: Optional[str] = _run_generated_subprocess(activity_code, mcp_config, extracted_params)
+            raw_result = stdout
+        else:
+            stdout = None
+            module = _load_generated_module(activity_code, mcp_config)
+            raw_result = {"ok": True, "results": _run_on_worker_loop(module.run(extracted_params))}
         # 표준 출력이 JSON이면 그대로 반환, 아니면 원문 반환
         try:
-            tool = workitem.get("tool") or ""
-            form_data = {}
-            if tool.startswith('formHandler:'):
-                form_id = tool.replace('formHandler:', '')
-                form_data = _generate_form_data(form_id, extracted_params)
+            form_data = form_future.result() if form_future is not None else {}
 
-            parsed = json.loads(stdout)
+            parsed = _loads(stdout) if stdout is not None else raw_result
             if isinstance(parsed, dict):
                 parsed.setdefault("form_result", form_data)
-                return json.dumps(parsed, ensure_ascii=False)
+                return _dumps(parsed)
             # 비-dict JSON이면 래핑하여 반환
             wrapped = {"ok": True, "results": parsed, "form_result": form_data}
             
-            return json.dumps(wrapped, ensure_ascii=False)
+            return _dumps(wrapped)
         except Exception:
-            return stdout
+            return stdout if stdout is not None else _dumps(raw_result, default=str)
     finally:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
+        if form_executor is not None:
+            form_executor.shutdown(wait=False)
 
 
 def _noop():
@@ -705,6 +983,8 @@ class DeterministicCodeTool(BaseTool):
         "Generate deterministic Python from event logs (generate) or execute saved code with a workitem (execute)."
     )
     args_schema: Type[BaseModel] = DeterministicCodeToolArgs
+    # True면 생성 코드를 별도 프로세스에서 실행 (기본값은 DETERMINISTIC_CODE_ISOLATE 환경 변수)
+    isolate: bool = DETERMINISTIC_CODE_ISOLATE
 
     def _run(
         self,
@@ -724,41 +1004,43 @@ class DeterministicCodeTool(BaseTool):
         try:
             workitem = fetch_workitem_by_id(todo_id)
             if not workitem:
-                return json.dumps({"error": f"todolist not found for todo_id={todo_id}"}, ensure_ascii=False)
+                return _dumps({"error": f"todolist not found for todo_id={todo_id}"})
 
             proc_def_id = workitem.get("proc_def_id")
             activity_id = workitem.get("activity_id")
             use_compensation = workitem.get("rework_count", 0) > 0
             if not proc_def_id or not activity_id:
-                return json.dumps({"error": "proc_def_id/activity_id missing in todolist"}, ensure_ascii=False)
+                return _dumps({"error": "proc_def_id/activity_id missing in todolist"})
 
             if action == "generate":
-                code_dict = _run_coro_safely(_generate_code(tenant_id, todo_id, proc_def_id, activity_id))
+                tool = workitem.get("tool") or ""
+                form_id = tool.replace('formHandler:', '') if tool.startswith('formHandler:') else None
+                code_dict = _run_coro_safely(_generate_code(tenant_id, todo_id, proc_def_id, activity_id, form_id))
                 # Return minimal confirmation (and parameters metadata)
-                return json.dumps({
+                return _dumps({
                     "ok": True,
                     "message": "code generated and saved",
                     "parameters": code_dict.get("parameters", {}),
-                }, ensure_ascii=False)
+                })
 
             # default: execute
             existed_code = fetch_mcp_python_code(proc_def_id, activity_id, tenant_id)
             if existed_code is None:
-                return json.dumps("no saved deterministic code.", ensure_ascii=False)
+                return _dumps("no saved deterministic code.")
             if use_compensation:
-                compensation_result = _execute_code(tenant_id, todo_id, existed_code, use_compensation)
-                exec_result = _execute_code(tenant_id, todo_id, existed_code, False)
+                compensation_result = _execute_code(tenant_id, todo_id, existed_code, use_compensation, self.isolate)
+                exec_result = _execute_code(tenant_id, todo_id, existed_code, False, self.isolate)
                 results = compensation_result.get("results", []) + exec_result.get("results", [])
                 form_result = exec_result.get("form_result")
-                return json.dumps({
+                return _dumps({
                     "ok": True,
                     "results": results,
                     "form_result": form_result
-                }, ensure_ascii=False)
+                })
             else:
-                exec_result = _execute_code(tenant_id, todo_id, existed_code, use_compensation)
+                exec_result = _execute_code(tenant_id, todo_id, existed_code, use_compensation, self.isolate)
                 return exec_result
         except Exception as e:
-            return json.dumps(f"run failed: {e}", ensure_ascii=False)
+            return _dumps(f"run failed: {e}")
 
 
@@ -1,23 +1,459 @@
 from __future__ import annotations
+import hashlib
+import io
 import os
+import re
 import logging
-import xml.etree.ElementTree as ET
-from typing import Type, Optional, Dict, Any, List
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Type, Optional, Dict, Any, List, Tuple
 from pydantic import BaseModel, Field, PrivateAttr
 from crewai.tools import BaseTool
 from dotenv import load_dotenv
-import openai
 import json
 
 from ..utils.database import get_db_client, initialize_db
+from ._feel import UnsupportedInput, output_value, parse_condition
+
+try:  # lxml이 있으면 C 파서 사용(없으면 표준 ElementTree)
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+try:  # pyahocorasick이 있으면 규칙 이름 토큰 매칭에 사용(없으면 토큰 색인 순회)
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+if TYPE_CHECKING:  # openai/httpx는 AI 추론 시점에 지연 import (도구 import 비용 절감)
+    import openai
 
 logger = logging.getLogger(__name__)
 
+# DMN 1.3 네임스페이스 (호출마다 dict를 만들지 않도록 모듈 상수로 유지)
+DMN_NS = {'dmn': 'https://www.omg.org/spec/DMN/20191111/MODEL/'}
+
+
+_DMN_URI = '{' + DMN_NS['dmn'] + '}'
+_DECISION_TAG = _DMN_URI + 'decision'
+_DECISION_TABLE_TAG = _DMN_URI + 'decisionTable'
+_INPUT_TAG = _DMN_URI + 'input'
+_OUTPUT_TAG = _DMN_URI + 'output'
+_RULE_TAG = _DMN_URI + 'rule'
+_INPUT_ENTRY_TAG = _DMN_URI + 'inputEntry'
+_OUTPUT_ENTRY_TAG = _DMN_URI + 'outputEntry'
+TEXT_TAG = _DMN_URI + 'text'
+
+
+@dataclass(slots=True)
+class DMNDecision:
+    """한 번의 순회로 추출한 결정 테이블 요약"""
+    name: str
+    inputs: List[Tuple[str, str]]  # (label, expression)
+    outputs: List[Tuple[str, str]]  # (label, name)
+    rules: List[Tuple[Tuple[str, ...], Tuple[str, ...]]]  # (conditions, results)
+    hit_policy: str = 'UNIQUE'
+    # 열 순서를 유지한 원문 entry (input entries, output entries) — 로컬 평가용
+    rows: List[Tuple[Tuple[str, ...], Tuple[str, ...]]] = field(default_factory=list)
+    # COLLECT의 aggregation 속성(SUM/COUNT/MIN/MAX), 없으면 None
+    aggregation: Optional[str] = None
+
+
+def _build_dmn_model(bpmn_xml: str) -> Optional[List[DMNDecision]]:
+    """iterparse로 XML을 한 번 훑으며 결정 테이블 모델을 바로 생성(전체 DOM을 유지하지 않음).
+    decision이 없으면 None."""
+    decisions: List[DMNDecision] = []
+    found_decision = False
+    stack: List[str] = []  # 현재 요소까지의 태그 경로
+
+    decision_name = 'Decision'
+    table_seen = False
+    in_table = False
+    hit_policy = 'UNIQUE'
+    aggregation: Optional[str] = None
+    inputs: List[Tuple[str, str]] = []
+    outputs: List[Tuple[str, str]] = []
+    rules: List[Tuple[Tuple[str, ...], Tuple[str, ...]]] = []
+    rows: List[Tuple[Tuple[str, ...], Tuple[str, ...]]] = []
+    raw_inputs: List[Optional[str]] = []  # entry별 text 원문(없으면 None)
+    raw_outputs: List[Optional[str]] = []
+    text: Optional[str] = None  # 현재 input/entry의 첫 text 값
+    text_found = False
+
+    for event, elem in ET.iterparse(io.BytesIO(bpmn_xml.encode('utf-8')), events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            parent = stack[-1] if stack else None
+            stack.append(tag)
+            if tag == _DECISION_TAG:
+                found_decision = True
+                decision_name = elem.get('name', 'Decision')
+                table_seen = False
+            elif tag == _DECISION_TABLE_TAG and not table_seen and _DECISION_TAG in stack:
+                table_seen = in_table = True
+                hit_policy = (elem.get('hitPolicy') or 'UNIQUE').upper()
+                aggregation = (elem.get('aggregation') or '').upper() or None
+                inputs, outputs, rules, rows = [], [], [], []
+            elif in_table and parent == _DECISION_TABLE_TAG and tag == _RULE_TAG:
+                raw_inputs, raw_outputs = [], []
+            elif in_table and tag in (_INPUT_TAG, _INPUT_ENTRY_TAG, _OUTPUT_ENTRY_TAG):
+                text, text_found = None, False
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+        if tag == TEXT_TAG:
+            if not text_found:
+                text, text_found = elem.text, True
+        elif tag == _DECISION_TAG:
+            # 끝난 decision은 비우고, lxml이면 앞선 형제 노드도 떼어내 메모리를 decision 하나 분량으로 유지
+            elem.clear()
+            if hasattr(elem, 'getprevious'):
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        elif not in_table:
+            pass
+        elif tag == _INPUT_ENTRY_TAG and parent == _RULE_TAG:
+            raw_inputs.append(text)
+        elif tag == _OUTPUT_ENTRY_TAG and parent == _RULE_TAG:
+            raw_outputs.append(text)
+        elif tag == _RULE_TAG and parent == _DECISION_TABLE_TAG:
+            rules.append((
+                tuple(t.strip() for t in raw_inputs if t and t != '-'),
+                tuple(t.strip() for t in raw_outputs if t),
+            ))
+            rows.append((
+                tuple((t or '').strip() for t in raw_inputs),
+                tuple((t or '').strip() for t in raw_outputs),
+            ))
+            elem.clear()
+        elif tag == _INPUT_TAG and parent == _DECISION_TABLE_TAG:
+            inputs.append((elem.get('label', ''), text if text_found else ''))
+            elem.clear()
+        elif tag == _OUTPUT_TAG and parent == _DECISION_TABLE_TAG:
+            outputs.append((elem.get('label', ''), elem.get('name', '')))
+            elem.clear()
+        elif tag == _DECISION_TABLE_TAG:
+            in_table = False
+            decisions.append(DMNDecision(decision_name, inputs, outputs, rules, hit_policy=hit_policy, rows=rows, aggregation=aggregation))
+
+    return decisions if found_decision else None
+
+
+# 로컬 평가에서 지원하는 hit policy (PRIORITY/OUTPUT ORDER 등 출력값 우선순위가 필요한 정책은 제외)
+_LOCAL_HIT_POLICIES = frozenset({'UNIQUE', 'FIRST', 'ANY', 'COLLECT', 'RULE ORDER'})
+_PAIR_SPLIT_RE = re.compile(r'[,\n]')
+_PAIR_RE = re.compile(r'^\s*([^=:]+?)\s*[=:]\s*(.+?)\s*$')
+
+
+def _structured_inputs(query: str) -> Optional[Dict[str, Any]]:
+    """쿼리가 JSON 객체나 `키=값, 키=값` 형태면 {소문자 키: 값}, 자연어면 None."""
+    text = query.strip()
+    if text.startswith('{'):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return None
+        return {str(k).strip().lower(): v for k, v in data.items()} if isinstance(data, dict) else None
+
+    values: Dict[str, Any] = {}
+    for part in _PAIR_SPLIT_RE.split(text):
+        if not part.strip():
+            continue
+        m = _PAIR_RE.match(part)
+        if not m:
+            return None
+        raw = m.group(2)
+        values[m.group(1).lower()] = raw[1:-1] if len(raw) >= 2 and raw[0] == raw[-1] == '"' else raw
+    return values or None
+
+
+def _local_evaluate(decisions: List[DMNDecision], values: Dict[str, Any]) -> Optional[List[str]]:
+    """FEEL 부분집합으로 결정 테이블을 직접 평가. 지원하지 않는 조건/정책이거나 입력이 부족하면 None."""
+    lines: List[str] = []
+    for d in decisions:
+        if d.hit_policy not in _LOCAL_HIT_POLICIES:
+            return None
+        # COLLECT+aggregation(합계/개수 등)은 로컬에서 집계하지 않으므로 LLM에 맡김
+        if d.hit_policy == 'COLLECT' and d.aggregation:
+            return None
+        column_values = []
+        for label, expr in d.inputs:
+            key = next((k for k in ((expr or '').strip().lower(), (label or '').strip().lower()) if k and k in values), None)
+            column_values.append(values[key] if key is not None else None)
+
+        matched = []
+        for idx, (input_entries, output_entries) in enumerate(d.rows, 1):
+            hit = True
+            for col, text in enumerate(input_entries):
+                test = parse_condition(text)
+                if test is None:
+                    return None
+                if text in ('', '-'):
+                    continue
+                if col >= len(column_values) or column_values[col] is None:
+                    return None
+                try:
+                    if not test(column_values[col]):
+                        hit = False
+                        break
+                except UnsupportedInput:
+                    return None
+            if hit:
+                matched.append((idx, output_entries))
+                if d.hit_policy == 'FIRST':
+                    break
+
+        # UNIQUE인데 여러 규칙이 매칭되면 테이블 오류이므로 임의로 고르지 않고 LLM에 맡김
+        if d.hit_policy == 'UNIQUE' and len(matched) > 1:
+            return None
+
+        input_desc = ', '.join(
+            f"{label or expr}={value}" for (label, expr), value in zip(d.inputs, column_values) if value is not None
+        )
+        lines.append(f"📋 **{d.name}** (hit policy: {d.hit_policy})")
+        lines.append(f"- 입력: {input_desc}")
+        if not matched:
+            lines.append("- ❌ 일치하는 규칙이 없습니다.")
+        for idx, output_entries in matched:
+            results = ', '.join(
+                f"{(label or name)}={output_value(text)}"
+                for (label, name), text in zip(d.outputs, output_entries)
+            )
+            lines.append(f"- ✅ 규칙 #{idx} 매칭 → {results}")
+    return lines
+
+
+# 의미 있는 토큰이 하나도 없는 쿼리는 전체 규칙 평가로 넘기지 않음
+_STOP = frozenset({'의', '은', '는', '이', '가', 'the', 'a', 'an', 'of', 'to'})
+_MIN_LEN = 2
+
+# 폴백 분석에서 "작동 방식" 질문으로 볼 단어(부분 문자열 매칭)
+_HOW_WORDS = ('어떻게', 'how')
+
+# 규칙 이름이 하나도 매칭되지 않았을 때 '모든 규칙' 폴백을 허용할 질문형 신호
+_QUESTION_WORDS = (
+    '?', '어떻게', '무엇', '뭐', '얼마', '언제', '어느', '어떤', '누구', '왜', '알려',
+    'how', 'what', 'which', 'when', 'who', 'why',
+)
+
+# 프롬프트의 규칙 표현 설명 (규칙은 생략하지 않고 행마다 위치 배열로 압축)
+_DMN_PROMPT_FORMAT_NOTE = (
+    "각 DMN 규칙 JSON의 rules는 [입력 entry 배열, 출력 entry 배열] 목록입니다. "
+    "entry 순서는 inputs/outputs 열 순서와 같고, '-'는 모든 값 허용, "
+    "규칙 번호는 rules 안의 위치(1부터)입니다.\n"
+)
+
+
+def _compact_dmn_for_prompt(dmn_structure: Dict[str, Any]) -> Dict[str, Any]:
+    """열 헤더는 한 번만 두고 규칙은 위치 배열로 표현해 토큰을 줄임 (모든 규칙과 순서를 유지)"""
+    decisions = []
+    for decision in dmn_structure['decisions']:
+        decisions.append({
+            'name': decision['name'],
+            'hitPolicy': decision.get('hit_policy', 'UNIQUE'),
+            'inputs': [inp['label'] or inp['expression'] for inp in decision['inputs']],
+            'outputs': [out['label'] or out['name'] for out in decision['outputs']],
+            'rules': [[[t or '-' for t in ins], list(outs)] for ins, outs in decision['rows']],
+        })
+    return {'decisions': decisions}
+
+
+def _dmn_prompt_json(dmn_structure: Dict[str, Any]) -> str:
+    # 들여쓰기 없는 compact JSON (indent=2 대비 프롬프트 토큰 절감)
+    return json.dumps(_compact_dmn_for_prompt(dmn_structure), ensure_ascii=False, separators=(',', ':'))
+
+
+# bpmn XML 해시 → 파생 결과. 복제된 규칙은 같은 XML을 가지므로 파싱/직렬화 결과를 공유한다.
+_DMN_CACHE_SIZE = 1024
+_DMN_CACHE_LOCK = threading.Lock()
+_dmn_model_cache: "OrderedDict[bytes, Optional[List[DMNDecision]]]" = OrderedDict()
+_dmn_struct_cache: "OrderedDict[bytes, Tuple[Optional[Dict[str, Any]], Optional[str]]]" = OrderedDict()
+
+
+def _bpmn_digest(bpmn_xml: str) -> bytes:
+    return hashlib.blake2b(bpmn_xml.encode('utf-8'), digest_size=16).digest()
+
+
+def _cached_by_digest(cache: OrderedDict, digest: bytes, build: Any) -> Any:
+    with _DMN_CACHE_LOCK:
+        if digest in cache:
+            cache.move_to_end(digest)
+            return cache[digest]
+    value = build()
+    with _DMN_CACHE_LOCK:
+        cache[digest] = value
+        if len(cache) > _DMN_CACHE_SIZE:
+            cache.popitem(last=False)
+    return value
+
+
+def _dmn_model(bpmn_xml: str, digest: Optional[bytes] = None) -> Optional[List[DMNDecision]]:
+    """규칙의 bpmn XML은 변하지 않으므로 요약 모델을 XML 해시로 캐시(digest를 알면 재해시 생략)."""
+    if digest is None:
+        digest = _bpmn_digest(bpmn_xml)
+    return _cached_by_digest(_dmn_model_cache, digest, lambda: _build_dmn_model(bpmn_xml))
+
 # ============================================================================
 # 설정 및 초기화
 # ============================================================================
 load_dotenv()
 
+# 규칙별 XML 파싱은 서로 독립적이므로 공용 스레드 풀에서 병렬 처리 (lxml은 파싱 중 GIL 해제)
+_PARSE_POOL = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4), thread_name_prefix="dmn-parse")
+
+# (tenant_id, user_id) → (조회 시각, 규칙 목록). 도구 인스턴스 생성마다 DB를 다시 조회하지 않도록 짧게 캐시
+_RULES_CACHE_TTL_SEC = 60.0
+_RULES_CACHE: Dict[Tuple[Optional[str], Optional[str]], Tuple[float, List[Dict[str, Any]]]] = {}
+_RULES_CACHE_LOCK = threading.Lock()
+
+# (규칙 이름+XML 해시들, 쿼리) → AI 답변. 같은 규칙에 같은 질문이면 OpenAI 호출 없이 반환
+_AI_CACHE_SIZE = 256
+_AI_CACHE_TTL_SEC = 600.0
+_AI_CACHE: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_AI_CACHE_LOCK = threading.Lock()
+
+
+def _ai_cache_key(dmn_contexts: List[Dict[str, Any]], query: str, structured: bool = False) -> str:
+    signature = ','.join(sorted(
+        f"{ctx['rule_name']}:{(ctx.get('bpmn_digest') or b'').hex()}" for ctx in dmn_contexts
+    ))
+    mode = 'json' if structured else 'md'
+    return hashlib.blake2b(f"{mode}|{signature}|{query}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _ai_cache_get(key: str) -> Optional[str]:
+    with _AI_CACHE_LOCK:
+        entry = _AI_CACHE.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= _AI_CACHE_TTL_SEC:
+            del _AI_CACHE[key]
+            return None
+        _AI_CACHE.move_to_end(key)
+        return entry[1]
+
+
+def _ai_cache_put(key: str, answer: str) -> None:
+    with _AI_CACHE_LOCK:
+        _AI_CACHE[key] = (time.monotonic(), answer)
+        _AI_CACHE.move_to_end(key)
+        if len(_AI_CACHE) > _AI_CACHE_SIZE:
+            _AI_CACHE.popitem(last=False)
+
+# 같은 키의 AI 요청이 동시에 들어오면 하나만 호출하고 결과를 공유 (single-flight)
+_AI_INFLIGHT: Dict[str, Future] = {}
+
+
+def _ai_inflight_begin(key: str) -> Tuple[Future, bool]:
+    """(future, owner). owner가 False면 이미 진행 중인 요청의 future."""
+    with _AI_CACHE_LOCK:
+        future = _AI_INFLIGHT.get(key)
+        if future is not None:
+            return future, False
+        future = _AI_INFLIGHT[key] = Future()
+        return future, True
+
+
+def _ai_inflight_end(key: str) -> None:
+    with _AI_CACHE_LOCK:
+        _AI_INFLIGHT.pop(key, None)
+
+
+_SYSTEM_PROMPT = """당신은 DMN(Decision Model and Notation) 1.3 규칙 추론 전문가입니다.
+주어진 DMN XML 모델과 사용자 질문을 분석하여 비즈니스 의사결정이 어떻게 이루어지는지 설명해야 합니다.
+
+다음 구조로 문서를 작성하세요(입력값이 없어도 규칙 자체 설명은 반드시 포함):
+
+1. **질문 분석 (Question Analysis)**
+   - 사용자가 무엇을 묻는지 요약하고 의도를 설명
+
+2. **규칙 요약 (Rule Overview)**
+   - 관련 결정 테이블의 입력, 출력, hit policy, 주요 규칙들을 간단히 요약
+   - 최소 1개 이상의 규칙 예시를 조건→결과 형태로 제시
+
+3. **규칙 매칭 (Rule Matching)**
+   - 마크다운 표: Rule ID | 조건(입력값 기준) | 결과(Output) | 매칭여부(✅/❌)
+   - 입력값이 부족해도 표는 채우되 매칭여부는 ❌로 표시하고, 무엇이 부족한지 주석으로 덧붙이기
+
+4. **조건 평가 (Condition Evaluation)**
+   - 매칭된(또는 매칭 불가한) 규칙의 조건 충족 여부를 단계별로 설명
+   - 사용된 hit policy와 그 의미 설명
+
+5. **최종 결과 (Final Result)**
+   - 비즈니스적으로 어떤 결정/등급/혜택이 적용되는지 명확히 제시.
+   - 필요시 실제 수치/금액/등급 해석을 포함
+"""
+
+# structured 모드: JSON 모드로 짧게 받아 마크다운은 로컬에서 렌더링 (출력 토큰 ↓ → 지연 ↓)
+_STRUCTURED_MAX_TOKENS = 400
+
+_STRUCTURED_SYSTEM_PROMPT = """당신은 DMN(Decision Model and Notation) 1.3 규칙 추론 전문가입니다.
+주어진 DMN 모델과 사용자 질문을 분석해 아래 스키마의 JSON 객체 하나만 출력하세요. 설명 문장이나 마크다운은 넣지 마세요.
+
+{
+  "question": "질문 요약과 의도 (한 문장)",
+  "rules_summary": "관련 결정 테이블의 입력/출력/hit policy 요약 (한두 문장)",
+  "matches": [
+    {"rule_id": "규칙 ID", "condition": "조건", "result": "결과", "matched": true, "note": "미충족/정보 부족 사유 (선택)"}
+  ],
+  "final_result": "적용되는 최종 결정/등급/혜택"
+}
+
+- matches에는 질문과 관련된 규칙만 간결하게 넣으세요.
+- 입력값이 부족하면 matched는 false로 하고 note에 부족한 항목을 적으세요.
+- 모든 문자열은 한국어로 작성하세요.
+"""
+
+
+def _render_structured_answer(data: Dict[str, Any]) -> str:
+    """structured 모드 JSON 응답을 기존 답변 형식의 마크다운으로 렌더링."""
+    buf = io.StringIO()
+    buf.write(f"## 🔍 질문 분석\n{data.get('question') or '-'}\n\n")
+    buf.write(f"## 📋 규칙 요약\n{data.get('rules_summary') or '-'}\n\n")
+    buf.write("## ✅ 규칙 매칭\n| Rule ID | 조건 | 결과 | 매칭여부 |\n|---|---|---|---|\n")
+    for match in data.get('matches') or []:
+        if not isinstance(match, dict):
+            continue
+        mark = '✅' if match.get('matched') else '❌'
+        note = match.get('note')
+        if note:
+            mark = f"{mark} ({note})"
+        cells = (match.get('rule_id'), match.get('condition'), match.get('result'), mark)
+        buf.write("| " + " | ".join(str(c if c is not None else '-').replace('|', '\\|') for c in cells) + " |\n")
+    buf.write(f"\n## 💡 최종 결과\n{data.get('final_result') or '-'}\n")
+    return buf.getvalue()
+
+# OpenAI 클라이언트는 API 키별로 한 번만 생성해 커넥션 풀/TLS 세션을 재사용
+_OPENAI_CLIENT: Optional["openai.OpenAI"] = None
+_OPENAI_KEY: Optional[str] = None
+_OPENAI_LOCK = threading.Lock()
+
+
+def _get_openai(api_key: str) -> "openai.OpenAI":
+    global _OPENAI_CLIENT, _OPENAI_KEY
+    with _OPENAI_LOCK:
+        if _OPENAI_CLIENT is None or _OPENAI_KEY != api_key:
+            import httpx
+            from openai import OpenAI
+            try:  # HTTP/2는 h2 패키지가 있을 때만 사용
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                http2 = False
+            _OPENAI_CLIENT = OpenAI(
+                api_key=api_key,
+                http_client=httpx.Client(
+                    http2=http2,
+                    limits=httpx.Limits(max_keepalive_connections=16),
+                ),
+            )
+            _OPENAI_KEY = api_key
+        return _OPENAI_CLIENT
+
 # ============================================================================
 # 스키마 정의
 # ============================================================================
@@ -51,9 +487,15 @@ class DMNRuleTool(BaseTool):
         "⚠️ 비즈니스 규칙 기반 도구 - 사용자별 규칙 관리"
     )
     args_schema: Type[DMNRuleQuerySchema] = DMNRuleQuerySchema
+    structured: bool = False  # True면 AI 답변을 JSON 모드(짧은 토큰 예산)로 받아 로컬에서 마크다운 렌더링
     _tenant_id: Optional[str] = PrivateAttr()
     _user_id: Optional[str] = PrivateAttr()
     _user_rules: List[Dict[str, Any]] = PrivateAttr(default_factory=list)
+    _token_rules: Dict[str, List[int]] = PrivateAttr(default_factory=dict)
+    _ac: Any = PrivateAttr(default=None)
+    _token_re: Optional[re.Pattern] = PrivateAttr(default=None)
+    _token_closure: Dict[str, List[int]] = PrivateAttr(default_factory=dict)
+    _rule_name_text: str = PrivateAttr(default='')
 
     def __init__(self, tenant_id: str = None, user_id: str = None, **kwargs):
         super().__init__(**kwargs)
@@ -77,17 +519,99 @@ class DMNRuleTool(BaseTool):
             raise
 
     def _load_user_rules(self) -> None:
-        """사용자 소유의 DMN 규칙들을 미리 조회"""
+        """사용자 소유의 DMN 규칙들을 미리 조회 (bpmn XML은 매칭된 규칙만 나중에 조회)"""
+        cache_key = (self._tenant_id, self._user_id)
+        with _RULES_CACHE_LOCK:
+            cached = _RULES_CACHE.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < _RULES_CACHE_TTL_SEC:
+            self._user_rules = cached[1]
+            self._index_rule_tokens()
+            logger.info("📋 사용자 DMN 규칙 캐시 사용 | user_id=%s, 규칙 개수=%d", self._user_id, len(self._user_rules))
+            return
+
         try:
             client = get_db_client()
-            response = client.table("proc_def").select("id, name, bpmn, owner, type").eq("owner", self._user_id).eq("type", "dmn").eq("isdeleted", False).eq("tenant_id", self._tenant_id).execute()
+            response = client.table("proc_def").select("id, name, owner, type").eq("owner", self._user_id).eq("type", "dmn").eq("isdeleted", False).eq("tenant_id", self._tenant_id).execute()
             
             self._user_rules = response.data if response.data else []
+            with _RULES_CACHE_LOCK:
+                _RULES_CACHE[cache_key] = (time.monotonic(), self._user_rules)
+            self._index_rule_tokens()
             logger.info("📋 사용자 DMN 규칙 로드 완료 | user_id=%s, 규칙 개수=%d", self._user_id, len(self._user_rules))
             
         except Exception as e:
             logger.error("❌ 사용자 DMN 규칙 로드 실패 | user_id=%s err=%s", self._user_id, str(e), exc_info=True)
             self._user_rules = []
+            self._index_rule_tokens()
+
+    def _ensure_bpmn(self, rules: List[Dict[str, Any]]) -> None:
+        """아직 bpmn XML이 없는 규칙들만 한 번의 쿼리로 조회해 규칙 dict에 채움"""
+        missing = [rule for rule in rules if 'bpmn' not in rule]
+        if not missing:
+            return
+        client = get_db_client()
+        response = client.table("proc_def").select("id, bpmn").in_("id", [rule['id'] for rule in missing]).eq("tenant_id", self._tenant_id).execute()
+        bpmn_by_id = {row['id']: row.get('bpmn') for row in (response.data or [])}
+        for rule in missing:
+            rule['bpmn'] = bpmn_by_id.get(rule['id'])
+        logger.info("📋 DMN 규칙 XML 조회 완료 | 규칙 개수=%d", len(missing))
+
+    def _rule_structure(self, rule: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """규칙의 DMN 구조와 프롬프트용 JSON 문자열을 한 번만 만들어 규칙 dict에 보관"""
+        if '_dmn_struct' not in rule:
+            bpmn_xml = rule.get('bpmn')
+            if bpmn_xml:
+                # XML 해시는 규칙당 한 번만 계산해 보관 (쿼리마다 XML 전체를 다시 해시하지 않음)
+                digest = rule['_bpmn_digest'] = _bpmn_digest(bpmn_xml)
+
+                def _build() -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+                    dmn_structure = self._parse_dmn_to_json(bpmn_xml, digest)
+                    return dmn_structure, (_dmn_prompt_json(dmn_structure) if dmn_structure else None)
+                rule['_dmn_struct'], rule['_dmn_json'] = _cached_by_digest(_dmn_struct_cache, digest, _build)
+            else:
+                rule['_dmn_struct'], rule['_dmn_json'] = None, None
+        return rule['_dmn_struct']
+
+    def _index_rule_tokens(self) -> None:
+        """규칙 이름 토큰 → 규칙 인덱스 색인 구성 (pyahocorasick이 있으면 오토마톤도 함께 생성)"""
+        token_rules: Dict[str, List[int]] = {}
+        for idx, rule in enumerate(self._user_rules):
+            for token in set((rule.get('name') or '').lower().split()):
+                token_rules.setdefault(token, []).append(idx)
+        self._token_rules = token_rules
+        # 쿼리 토큰이 규칙 이름 토큰의 일부인지(예: '휴가' ⊂ '휴가규정') 보는 도메인 신호용
+        self._rule_name_text = ' '.join(token_rules)
+
+        self._ac = None
+        self._token_re = None
+        self._token_closure = {}
+        if not token_rules:
+            return
+        if ahocorasick is not None:
+            ac = ahocorasick.Automaton()
+            for token, idxs in token_rules.items():
+                ac.add_word(token, idxs)
+            ac.make_automaton()
+            self._ac = ac
+            return
+
+        # 모든 토큰을 하나의 정규식(C 엔진)으로 스캔. 위치마다 가장 긴 토큰만 잡히므로
+        # 매칭된 토큰에 포함된 짧은 토큰들의 규칙까지 closure로 미리 합쳐 둔다.
+        tokens = sorted(token_rules, key=len, reverse=True)
+        self._token_re = re.compile('(?=(' + '|'.join(map(re.escape, tokens)) + '))')
+        for token in tokens:
+            idxs = {i for other in tokens if other in token for i in token_rules[other]}
+            self._token_closure[token] = sorted(idxs)
+
+    def _match_rules(self, query_lower: str) -> List[Dict[str, Any]]:
+        """이름 토큰이 쿼리에 부분 문자열로 포함된 규칙들(원래 순서 유지)"""
+        if self._ac is not None:
+            hits = {i for _, idxs in self._ac.iter(query_lower) for i in idxs}
+        elif self._token_re is not None:
+            hits = {i for token in set(self._token_re.findall(query_lower)) for i in self._token_closure[token]}
+        else:
+            hits = set()
+        return [self._user_rules[i] for i in sorted(hits)]
 
     def _run(self, query: str, context: Optional[str] = None) -> str:
         """사용자 DMN 규칙들을 기반으로 쿼리 분석 및 추론"""
@@ -103,7 +627,7 @@ class DMNRuleTool(BaseTool):
 
         try:
             # 쿼리 분석 및 관련 규칙 찾기
-            analysis_result = self._analyze_query_with_rules(query, context)
+            analysis_result = self._analyze_query_with_rules(query, context, query.lower())
             
             logger.info("✅ DMN 규칙 기반 쿼리 분석 완료 | tenant_id=%s", self._tenant_id)
             return analysis_result
@@ -111,198 +635,177 @@ class DMNRuleTool(BaseTool):
         except Exception as e:
             logger.error("❌ DMN 규칙 기반 쿼리 분석 실패 | tenant_id=%s query=%s err=%s", 
             self._tenant_id, query, str(e), exc_info=True)
-            raise
+            return f"쿼리 분석 중 오류가 발생했습니다: {str(e)}"
 
-    def _analyze_query_with_rules(self, query: str, context: Optional[str] = None) -> str:
+    def _analyze_query_with_rules(self, query: str, context: Optional[str] = None, query_lower: Optional[str] = None) -> str:
         """사용자 DMN 규칙들을 기반으로 쿼리 분석 및 추론"""
-        try:
-            # 쿼리에서 키워드 추출
+        # 쿼리에서 키워드 추출
+        if query_lower is None:
             query_lower = query.lower()
-            
-            # 관련 규칙 찾기
-            relevant_rules = []
-            for rule in self._user_rules:
-                rule_name = rule.get('name', '').lower()
-                if any(keyword in query_lower for keyword in rule_name.split()):
-                    relevant_rules.append(rule)
-            
-            # 규칙 이름으로 직접 매칭되지 않으면 모든 규칙을 고려
-            if not relevant_rules:
-                relevant_rules = self._user_rules
-            
-            if not relevant_rules:
-                return f"사용자 '{self._user_id}'의 DMN 규칙 중 쿼리와 관련된 규칙을 찾을 수 없습니다."
-            
-            # 쿼리 분석 및 답변 추론
-            answer = self._evaluate_with_rules(query, relevant_rules)
-            
-            return answer
-            
-        except Exception as e:
-            logger.error("❌ 쿼리 분석 실패 | err=%s", str(e))
-            return f"쿼리 분석 중 오류가 발생했습니다: {str(e)}"
 
-    def _evaluate_with_rules(self, query: str, rules: List[Dict[str, Any]]) -> str:
-        """DMN 규칙을 기반으로 쿼리 평가 - LLM 분석 사용"""
-        try:
-            # 모든 규칙을 함께 분석하기 위해 DMN XML들을 수집
-            dmn_contexts = []
-            for rule in rules:
-                rule_name = rule.get('name', '규칙')
-                bpmn_xml = rule.get('bpmn')
-                
-                if bpmn_xml:
-                    dmn_structure = self._parse_dmn_to_json(bpmn_xml)
-                    if dmn_structure:
-                        dmn_contexts.append({
-                            'rule_name': rule_name,
-                            'dmn_structure': dmn_structure,
-                            'bpmn_xml': bpmn_xml
-                        })
-            
-            if not dmn_contexts:
+        # 불용어/한 글자 토큰뿐이면 모든 규칙을 파싱·평가하지 않고 바로 반환
+        meaningful = [t for t in query_lower.split() if len(t) >= _MIN_LEN and t not in _STOP]
+        if not meaningful:
+            return f"'{query}'에 대한 DMN 규칙을 찾을 수 없습니다."
+        
+        # 관련 규칙 찾기
+        relevant_rules = self._match_rules(query_lower)
+        values = _structured_inputs(query)
+        
+        # 규칙 이름으로 직접 매칭되지 않으면 모든 규칙을 고려하되, 구조화 입력이 아니고
+        # 질문형도 아니며 규칙 이름과 겹치는 토큰도 없으면(규칙 도메인 밖) 전체 규칙을 LLM에 보내지 않음
+        if not relevant_rules:
+            if (
+                values is None
+                and not any(word in query_lower for word in _QUESTION_WORDS)
+                and not any(t in self._rule_name_text for t in meaningful)
+            ):
+                logger.info("⏭️ 규칙 이름 매칭 없음, 질문형/겹치는 토큰 없음 → 평가 생략 | query=%s", query)
                 return f"'{query}'에 대한 DMN 규칙을 찾을 수 없습니다."
-            
-            return self._ai_inference_with_dmn(dmn_contexts, query)
-                
-        except Exception as e:
-            logger.error("❌ 규칙 평가 실패 | err=%s", str(e))
-            return f"규칙 평가 중 오류가 발생했습니다: {str(e)}"
+            relevant_rules = self._user_rules
+        
+        if not relevant_rules:
+            return f"사용자 '{self._user_id}'의 DMN 규칙 중 쿼리와 관련된 규칙을 찾을 수 없습니다."
+        
+        # 쿼리 분석 및 답변 추론
+        return self._evaluate_with_rules(query, relevant_rules, query_lower, values)
 
-    def _parse_dmn_to_json(self, bpmn_xml: str) -> Optional[Dict[str, Any]]:
+    def _evaluate_with_rules(self, query: str, rules: List[Dict[str, Any]], query_lower: Optional[str] = None, values: Optional[Dict[str, Any]] = None) -> str:
+        """DMN 규칙을 기반으로 쿼리 평가 - LLM 분석 사용"""
+        # 모든 규칙을 함께 분석하기 위해 DMN XML들을 수집
+        self._ensure_bpmn(rules)
+        unparsed = [rule for rule in rules if '_dmn_struct' not in rule]
+        if len(unparsed) > 1:
+            list(_PARSE_POOL.map(self._rule_structure, unparsed))
+        dmn_contexts = []
+        for rule in rules:
+            rule_name = rule.get('name', '규칙')
+            dmn_structure = self._rule_structure(rule)
+            if dmn_structure:
+                dmn_contexts.append({
+                    'rule_name': rule_name,
+                    'dmn_structure': dmn_structure,
+                    'dmn_json': rule['_dmn_json'],
+                    'bpmn_xml': rule.get('bpmn'),
+                    'bpmn_digest': rule.get('_bpmn_digest')
+                })
+        
+        if not dmn_contexts:
+            return f"'{query}'에 대한 DMN 규칙을 찾을 수 없습니다."
+
+        # 입력값이 구조화되어 있고 조건이 단순하면 LLM 없이 로컬에서 평가
+        if values is None:
+            values = _structured_inputs(query)
+        if values is not None:
+            local_answer = self._local_evaluate_contexts(dmn_contexts, values)
+            if local_answer is not None:
+                return local_answer
+        
+        return self._ai_inference_with_dmn(dmn_contexts, query, query_lower)
+
+    def _local_evaluate_contexts(self, dmn_contexts: List[Dict[str, Any]], values: Dict[str, Any]) -> Optional[str]:
+        """모든 규칙을 로컬 평가할 수 있을 때만 결과 문자열 반환"""
+        sections = []
+        for ctx in dmn_contexts:
+            decisions = _dmn_model(ctx['bpmn_xml'], ctx.get('bpmn_digest')) if ctx.get('bpmn_xml') else None
+            if not decisions:
+                return None
+            lines = _local_evaluate(decisions, values)
+            if lines is None:
+                return None
+            sections.append(f"=== {ctx['rule_name']} ===\n" + "\n".join(lines))
+        logger.info("✅ DMN 로컬 평가 완료 | contexts=%d", len(dmn_contexts))
+        return "\n\n".join(sections)
+
+    def _parse_dmn_to_json(self, bpmn_xml: str, digest: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
         """DMN XML을 JSON 구조로 변환"""
         try:
-            root = ET.fromstring(bpmn_xml)
-            dmn_ns = {'dmn': 'https://www.omg.org/spec/DMN/20191111/MODEL/'}
-            
-            decisions = root.findall('.//dmn:decision', dmn_ns)
-            
-            if not decisions:
+            decisions = _dmn_model(bpmn_xml, digest)
+            if decisions is None:
                 return None
-            
-            dmn_data = {
-                'decisions': []
+
+            return {
+                'decisions': [
+                    {
+                        'name': d.name,
+                        'inputs': [{'label': label, 'expression': expr} for label, expr in d.inputs],
+                        'outputs': [{'label': label, 'name': name} for label, name in d.outputs],
+                        'rules': [
+                            {'conditions': list(conditions), 'results': list(results)}
+                            for conditions, results in d.rules
+                        ],
+                        'hit_policy': d.hit_policy,
+                        # 열 위치를 유지한 원문 entry (프롬프트용 압축 표현에 사용)
+                        'rows': [[list(ins), list(outs)] for ins, outs in d.rows],
+                    }
+                    for d in decisions
+                ]
             }
-            
-            for decision in decisions:
-                decision_name = decision.get('name', 'Decision')
-                decision_table = decision.find('.//dmn:decisionTable', dmn_ns)
-                
-                if decision_table is not None:
-                    # Input 분석
-                    inputs = decision_table.findall('.//dmn:input', dmn_ns)
-                    input_data = []
-                    for inp in inputs:
-                        input_label = inp.get('label', '')
-                        input_expr = inp.find('.//dmn:text', dmn_ns)
-                        input_text = input_expr.text if input_expr is not None else ''
-                        input_data.append({
-                            'label': input_label,
-                            'expression': input_text
-                        })
-                    
-                    # Output 분석
-                    outputs = decision_table.findall('.//dmn:output', dmn_ns)
-                    output_data = []
-                    for out in outputs:
-                        output_label = out.get('label', '')
-                        output_name = out.get('name', '')
-                        output_data.append({
-                            'label': output_label,
-                            'name': output_name
-                        })
-                    
-                    # Rule 분석
-                    rules = decision_table.findall('.//dmn:rule', dmn_ns)
-                    rule_data = []
-                    for rule in rules:
-                        input_entries = rule.findall('.//dmn:inputEntry', dmn_ns)
-                        output_entries = rule.findall('.//dmn:outputEntry', dmn_ns)
-                        
-                        conditions = []
-                        for entry in input_entries:
-                            text_elem = entry.find('.//dmn:text', dmn_ns)
-                            if text_elem is not None and text_elem.text and text_elem.text != '-':
-                                conditions.append(text_elem.text.strip())
-                        
-                        results = []
-                        for entry in output_entries:
-                            text_elem = entry.find('.//dmn:text', dmn_ns)
-                            if text_elem is not None and text_elem.text:
-                                results.append(text_elem.text.strip())
-                        
-                        rule_data.append({
-                            'conditions': conditions,
-                            'results': results
-                        })
-                    
-                    dmn_data['decisions'].append({
-                        'name': decision_name,
-                        'inputs': input_data,
-                        'outputs': output_data,
-                        'rules': rule_data
-                    })
-            
-            return dmn_data
-            
-        except Exception as e:
+
+        except ET.ParseError as e:
             logger.error("❌ DMN 파싱 실패 | err=%s", str(e))
             return None
     
-    def _ai_inference_with_dmn(self, dmn_contexts: List[Dict[str, Any]], query: str) -> str:
+    def _ai_inference_with_dmn(self, dmn_contexts: List[Dict[str, Any]], query: str, query_lower: Optional[str] = None) -> str:
         """AI를 활용한 DMN 규칙 기반 추론 (여러 규칙 컨텍스트 지원)"""
         try:
             # OpenAI API 키 확인
             openai_api_key = os.getenv('OPENAI_API_KEY')
             if not openai_api_key:
                 logger.warning("⚠️ OPENAI_API_KEY가 설정되지 않음. 기본 분석 모드로 전환")
-                return self._fallback_analysis_multi(dmn_contexts, query)
+                return self._fallback_analysis_multi(dmn_contexts, query, query_lower)
             
-            # AI 프롬프트 구성
-            prompt = self._build_ai_prompt(dmn_contexts, query)
-
-            # OpenAI API 호출
-            client = openai.OpenAI(api_key=openai_api_key)
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """당신은 DMN(Decision Model and Notation) 1.3 규칙 추론 전문가입니다.
-주어진 DMN XML 모델과 사용자 질문을 분석하여 비즈니스 의사결정이 어떻게 이루어지는지 설명해야 합니다.
+            cache_key = _ai_cache_key(dmn_contexts, query, self.structured)
+            cached = _ai_cache_get(cache_key)
+            if cached is not None:
+                logger.info("✅ AI 추론 캐시 사용 | contexts=%d", len(dmn_contexts))
+                return cached
 
-다음 구조로 문서를 작성하세요(입력값이 없어도 규칙 자체 설명은 반드시 포함):
-
-1. **질문 분석 (Question Analysis)**
-   - 사용자가 무엇을 묻는지 요약하고 의도를 설명
-
-2. **규칙 요약 (Rule Overview)**
-   - 관련 결정 테이블의 입력, 출력, hit policy, 주요 규칙들을 간단히 요약
-   - 최소 1개 이상의 규칙 예시를 조건→결과 형태로 제시
-
-3. **규칙 매칭 (Rule Matching)**
-   - 마크다운 표: Rule ID | 조건(입력값 기준) | 결과(Output) | 매칭여부(✅/❌)
-   - 입력값이 부족해도 표는 채우되 매칭여부는 ❌로 표시하고, 무엇이 부족한지 주석으로 덧붙이기
+            inflight, owner = _ai_inflight_begin(cache_key)
+            if not owner:
+                # 같은 규칙/질문의 요청이 진행 중이면 그 결과를 기다려 공유
+                return inflight.result()
 
-4. **조건 평가 (Condition Evaluation)**
-   - 매칭된(또는 매칭 불가한) 규칙의 조건 충족 여부를 단계별로 설명
-   - 사용된 hit policy와 그 의미 설명
+            try:
+                # AI 프롬프트 구성
+                prompt = self._build_ai_prompt(dmn_contexts, query, self.structured)
 
-5. **최종 결과 (Final Result)**
-   - 비즈니스적으로 어떤 결정/등급/혜택이 적용되는지 명확히 제시.
-   - 필요시 실제 수치/금액/등급 해석을 포함
-"""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
+                # OpenAI API 호출
+                client = _get_openai(openai_api_key)
+                if self.structured:
+                    options = {
+                        "max_tokens": _STRUCTURED_MAX_TOKENS,
+                        "temperature": 0,
+                        "response_format": {"type": "json_object"},
                     }
-                ],
-                max_tokens=1000,
-                temperature=0.3
-            )
-            
-            ai_response = response.choices[0].message.content.strip()
+                else:
+                    options = {"max_tokens": 1000, "temperature": 0.3}
+                response = client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": _STRUCTURED_SYSTEM_PROMPT if self.structured else _SYSTEM_PROMPT
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    **options
+                )
+
+                ai_response = response.choices[0].message.content.strip()
+                if self.structured:
+                    # JSON이 잘렸거나 깨졌으면 예외 → 폴백 분석
+                    ai_response = _render_structured_answer(json.loads(ai_response))
+                _ai_cache_put(cache_key, ai_response)
+                inflight.set_result(ai_response)
+            except Exception as e:
+                inflight.set_exception(e)
+                raise
+            finally:
+                _ai_inflight_end(cache_key)
             logger.info("✅ AI 추론 완료 | contexts=%d", len(dmn_contexts))
             
             return ai_response
@@ -310,29 +813,38 @@ class DMNRuleTool(BaseTool):
         except Exception as e:
             logger.error("❌ AI 추론 실패 | err=%s", str(e))
             # AI 실패 시 폴백 분석 사용 (여러 컨텍스트)
-            fallback_answers = []
-            for ctx in dmn_contexts:
-                rule_name = ctx.get('rule_name', '규칙')
-                dmn_structure = ctx.get('dmn_structure')
-                if dmn_structure:
-                    fallback_answers.append(self._fallback_analysis(dmn_structure, rule_name, query))
-            return "\n\n".join(ans for ans in fallback_answers if ans)
-
-    def _build_ai_prompt(self, dmn_contexts: List[Dict[str, Any]], query: str) -> str:
+            return self._fallback_analysis_multi(dmn_contexts, query, query_lower)
+
+    def _fallback_analysis_multi(self, dmn_contexts: List[Dict[str, Any]], query: str, query_lower: Optional[str] = None) -> str:
+        """여러 규칙 컨텍스트에 대한 기본 분석 결과를 합침"""
+        fallback_answers = []
+        for ctx in dmn_contexts:
+            rule_name = ctx.get('rule_name', '규칙')
+            dmn_structure = ctx.get('dmn_structure')
+            if dmn_structure:
+                fallback_answers.append(self._fallback_analysis(dmn_structure, rule_name, query, query_lower))
+        return "\n\n".join(ans for ans in fallback_answers if ans)
+
+    def _build_ai_prompt(self, dmn_contexts: List[Dict[str, Any]], query: str, structured: bool = False) -> str:
         """AI 추론을 위한 프롬프트 구성"""
-        prompt_parts = []
+        prompt_parts = [_DMN_PROMPT_FORMAT_NOTE]
         
         # DMN 규칙들 설명
         for i, ctx in enumerate(dmn_contexts, 1):
             rule_name = ctx['rule_name']
-            dmn_structure = ctx['dmn_structure']
+            # 규칙 로드 시 미리 직렬화한 JSON 재사용
+            dmn_json = ctx.get('dmn_json') or _dmn_prompt_json(ctx['dmn_structure'])
             
             prompt_parts.append(f"=== DMN 규칙 {i}: {rule_name} ===\n")
-            prompt_parts.append(json.dumps(dmn_structure, ensure_ascii=False, indent=2))
+            prompt_parts.append(dmn_json)
             prompt_parts.append("\n")
         
         # 사용자 쿼리
         prompt_parts.append(f"\n사용자 쿼리: \"{query}\"\n")
+
+        if structured:
+            prompt_parts.append("\n위 DMN 규칙들을 분석하여 지정된 스키마의 JSON 객체로만 답하세요.\n")
+            return "".join(prompt_parts)
         
         # 지시사항
         prompt_parts.append("""
@@ -349,51 +861,39 @@ class DMNRuleTool(BaseTool):
         
         return "".join(prompt_parts)
 
-    def _fallback_analysis(self, dmn_structure: Dict[str, Any], rule_name: str, query: str) -> str:
+    def _fallback_analysis(self, dmn_structure: Dict[str, Any], rule_name: str, query: str, query_lower: Optional[str] = None) -> str:
         """AI 실패 시 사용할 기본 분석"""
         try:
-            answers = []
-            
-            for decision in dmn_structure['decisions']:
-                decision_name = decision['name']
-                inputs = decision['inputs']
-                outputs = decision['outputs']
-                rules = decision['rules']
-                
+            if query_lower is None:
+                query_lower = query.lower()
+            is_how = any(word in query_lower for word in _HOW_WORDS)
+            if is_how:
+                # 방법 설명
+                header_suffix, input_label, rules_label = "은 다음과 같이 작동합니다:\n", "- 입력: ", "- 규칙 예시:\n"
+            else:
+                # 평가/결정 답변
+                header_suffix, input_label, rules_label = "에 따르면:\n", "- 평가 기준: ", "- 규칙:\n"
+
+            buf = io.StringIO()
+            for idx, decision in enumerate(dmn_structure['decisions']):
+                if idx:
+                    buf.write("\n\n")
+                buf.write(f"{rule_name}의 {decision['name']}{header_suffix}")
+
                 # 입력 파라미터 설명
-                input_descriptions = []
-                for inp in inputs:
-                    if inp['expression']:
-                        input_descriptions.append(inp['expression'])
-                
-                # 규칙 설명
-                rule_descriptions = []
-                for rule in rules[:5]:  # 처음 5개 규칙만
+                input_descriptions = [inp['expression'] for inp in decision['inputs'] if inp['expression']]
+                if input_descriptions:
+                    buf.write(f"{input_label}{', '.join(input_descriptions)}\n")
+
+                # 규칙 설명 (처음 5개 규칙만)
+                first_line = True
+                for rule in decision['rules'][:5]:
                     if rule['conditions'] and rule['results']:
-                        conditions_str = ' AND '.join(rule['conditions'])
-                        results_str = ', '.join(rule['results'])
-                        rule_descriptions.append(f"  • {conditions_str} → {results_str}")
-                
-                # 답변 생성
-                if '어떻게' in query.lower() or 'how' in query.lower():
-                    # 방법 설명
-                    answer = f"{rule_name}의 {decision_name}은 다음과 같이 작동합니다:\n"
-                    if input_descriptions:
-                        answer += f"- 입력: {', '.join(input_descriptions)}\n"
-                    if rule_descriptions:
-                        answer += "- 규칙 예시:\n" + "\n".join(rule_descriptions)
-                    answers.append(answer)
-                
-                else:
-                    # 평가/결정 답변
-                    answer = f"{rule_name}의 {decision_name}에 따르면:\n"
-                    if input_descriptions:
-                        answer += f"- 평가 기준: {', '.join(input_descriptions)}\n"
-                    if rule_descriptions:
-                        answer += "- 규칙:\n" + "\n".join(rule_descriptions)
-                    answers.append(answer)
-            
-            return "\n\n".join(answers) if answers else f"{rule_name}: 쿼리에 대한 답변을 생성할 수 없습니다."
+                        buf.write(rules_label if first_line else "\n")
+                        first_line = False
+                        buf.write(f"  • {' AND '.join(rule['conditions'])} → {', '.join(rule['results'])}")
+
+            return buf.getvalue() or f"{rule_name}: 쿼리에 대한 답변을 생성할 수 없습니다."
             
         except Exception as e:
             logger.error("❌ 폴백 분석 실패 | err=%s", str(e))
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import json
 import logging
+import random
+import threading
 import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional, List, Type, Dict, Any, Literal
 
 from pydantic import BaseModel, Field
@@ -14,10 +17,14 @@ from ..utils.database import (
     fetch_human_response_sync,
     save_notification_sync,
     save_event_sync,
+    wait_human_response_realtime,
 )
 
 logger = logging.getLogger(__name__)
 
+# 알림은 이벤트 저장이 성공한 뒤 별도 스레드에서 저장하고, 그동안 응답 대기를 시작
+_NOTIFY_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="human-notify")
+
 
 # ---------------------------------------------------------------------
 # 스키마
@@ -102,12 +109,26 @@ class HumanQueryTool(BaseTool):
         self._tenant_id = tenant_id
         self._agent_name = agent_name
         self._user_ids_csv = user_ids_csv
+        self._cancel_event = threading.Event()
 
         logger.info("\n\n✅ HumanQueryTool 초기화 완료 | proc_inst_id=%s task_id=%s tenant_id=%s agent_name=%s user_ids_csv=%s", proc_inst_id, task_id, tenant_id, agent_name, user_ids_csv)
 
+    def cancel(self) -> None:
+        """진행 중인 사용자 응답 대기를 즉시 중단."""
+        self._cancel_event.set()
+
+    def _log_notify_result(self, future: Future) -> None:
+        """백그라운드 알림 저장 결과를 로그로 남김(실패해도 이벤트는 이미 저장되어 있으므로 대기는 계속)."""
+        err = future.exception()
+        if err is None:
+            logger.info("✅ 사용자 알림 저장 완료 | user_ids_csv=%s", self._user_ids_csv)
+        else:
+            logger.error("❌ 사용자 알림 저장 실패 | user_ids_csv=%s err=%s", self._user_ids_csv, str(err), exc_info=err)
+
     # CrewAI Tool 규약: 동기 실행 (내부 비동기 작업은 sync 래퍼 사용)
     def _run(self, role: str, text: str, type: str = "text", options: Optional[List[str]] = None) -> str:
         logger.info("\n\n👤 사용자 확인 요청 시작 | role=%s type=%s", role, type)
+        self._cancel_event.clear()
         
         # 1) 컨텍스트 정보 가져오기
         ctx = get_context_snapshot()
@@ -124,7 +145,7 @@ class HumanQueryTool(BaseTool):
         # 3) job_id 발급
         job_id = f"human_asked_{uuid.uuid4()}"
 
-        # 4) 이벤트를 DB에 직접 저장
+        # 4) 이벤트를 DB에 직접 저장 (실패하면 알림도 보내지 않음)
         try:
             save_event_sync(
                 job_id=job_id,
@@ -139,24 +160,21 @@ class HumanQueryTool(BaseTool):
             logger.error("❌ 사용자 확인 이벤트 DB 저장 실패 | proc=%s task=%s job_id=%s err=%s", self._proc_inst_id, self._task_id, job_id, str(e), exc_info=True)
             raise
 
-        # 5) 알림 저장 (있으면)
-        try:
-            if self._user_ids_csv and self._user_ids_csv.strip():
-                save_notification_sync(
-                    title=text,
-                    notif_type="workitem_bpm",
-                    description=self._agent_name,
-                    user_ids_csv=self._user_ids_csv,
-                    tenant_id=self._tenant_id,
-                    url=f"/todolist/{self._task_id}" if self._task_id else None,
-                    from_user_id=self._agent_name,
-                )
-                logger.info("✅ 사용자 알림 저장 완료 | user_ids_csv=%s", self._user_ids_csv)
-            else:
-                logger.info("⏭️ 사용자 알림 저장 생략: user_ids_csv 비어있음")
-        except Exception as e:
-            logger.error("❌ 사용자 알림 저장 실패 | user_ids_csv=%s err=%s", self._user_ids_csv, str(e), exc_info=True)
-            raise
+        # 5) 알림 저장 (있으면) — 이벤트 저장 성공 후 별도 스레드에서 진행하고 응답 대기는 바로 시작
+        if self._user_ids_csv and self._user_ids_csv.strip():
+            notify_future = _NOTIFY_POOL.submit(
+                save_notification_sync,
+                title=text,
+                notif_type="workitem_bpm",
+                description=self._agent_name,
+                user_ids_csv=self._user_ids_csv,
+                tenant_id=self._tenant_id,
+                url=f"/todolist/{self._task_id}" if self._task_id else None,
+                from_user_id=self._agent_name,
+            )
+            notify_future.add_done_callback(self._log_notify_result)
+        else:
+            logger.info("⏭️ 사용자 알림 저장 생략: user_ids_csv 비어있음")
 
         # 6) DB에서 사람 응답 폴링
         logger.info("\n\n⏳ 사용자 응답 대기 시작 | job_id=%s", job_id)
@@ -165,22 +183,30 @@ class HumanQueryTool(BaseTool):
         return answer
 
     # -----------------------------------------------------------------
-    # 응답 폴링 (DB events 테이블)
+    # 응답 대기 (DB events 테이블: Realtime 구독, 실패 시 폴링)
     # -----------------------------------------------------------------
-    def _wait_for_response(self, job_id: str, timeout_sec: int = 180, poll_interval_sec: int = 5) -> str:
+    def _wait_for_response(self, job_id: str, timeout_sec: int = 180, max_poll_interval_sec: float = 10.0) -> str:
         deadline = time.time() + timeout_sec
-        error_count = 0
 
+        try:
+            event = wait_human_response_realtime(job_id=job_id, timeout_sec=timeout_sec, cancel_event=self._cancel_event)
+            if event:
+                return self._answer_from_event(job_id, event)
+            if self._cancel_event.is_set():
+                logger.warning("🛑 사용자 응답 대기 취소 | job_id=%s", job_id)
+                return "사용자 응답 대기 취소"
+            logger.warning("⏰ 사용자 응답 타임아웃 | job_id=%s timeout=%ds", job_id, timeout_sec)
+            return "사용자 미응답 거절"
+        except Exception as e:
+            logger.warning("⚠️ Realtime 대기 실패, 폴링으로 전환 | job_id=%s err=%s", job_id, str(e))
+
+        error_count = 0
+        attempts = 0
         while time.time() < deadline:
             try:
                 event = fetch_human_response_sync(job_id=job_id)
                 if event:
-                    data = (event.get("data") or {})
-                    answer = data.get("answer")
-                    if isinstance(answer, str):
-                        logger.info("✅ 사용자 응답 수신 성공 | job_id=%s", job_id)
-                        return answer
-                    return json.dumps(data, ensure_ascii=False)
+                    return self._answer_from_event(job_id, event)
                 error_count = 0  # 성공 시 에러 카운트 리셋
             except Exception as e:
                 logger.error("❌ 사용자 응답 폴링 오류 | job_id=%s err=%s", job_id, str(e), exc_info=True)
@@ -189,8 +215,22 @@ class HumanQueryTool(BaseTool):
                     logger.error("💥 사용자 응답 폴링 중단 | job_id=%s 연속 오류 3회", job_id)
                     raise RuntimeError("human_asked polling aborted after 3 consecutive errors") from e
                 logger.warning("⚠️ 사용자 응답 폴링 재시도 | job_id=%s error_count=%d", job_id, error_count)
-            
-            time.sleep(poll_interval_sec)
+
+            # 지수 백오프(1s → 1.5s → … 최대 max_poll_interval_sec) + ±20% 지터, 마감 시각은 넘기지 않음
+            interval = min(max_poll_interval_sec, 1.5 ** attempts) * random.uniform(0.8, 1.2)
+            attempts += 1
+            if self._cancel_event.wait(max(0.0, min(interval, deadline - time.time()))):
+                logger.warning("🛑 사용자 응답 대기 취소 | job_id=%s", job_id)
+                return "사용자 응답 대기 취소"
 
         logger.warning("⏰ 사용자 응답 타임아웃 | job_id=%s timeout=%ds", job_id, timeout_sec)
         return "사용자 미응답 거절"
+
+    @staticmethod
+    def _answer_from_event(job_id: str, event: Dict[str, Any]) -> str:
+        data = (event.get("data") or {})
+        answer = data.get("answer")
+        if isinstance(answer, str):
+            logger.info("✅ 사용자 응답 수신 성공 | job_id=%s", job_id)
+            return answer
+        return json.dumps(data, ensure_ascii=False)
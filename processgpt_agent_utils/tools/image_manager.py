@@ -1,8 +1,13 @@
 import os
-import base64
+import asyncio
+import binascii
+import hashlib
 import logging
+import threading
 import traceback
-from typing import Type, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple, Type, Optional
 from pydantic import BaseModel, Field, PrivateAttr
 from crewai.tools import BaseTool
 from dotenv import load_dotenv
@@ -10,9 +15,6 @@ from datetime import datetime
 from pathlib import Path
 import uuid
 
-from openai import OpenAI
-from supabase import create_client, Client
-
 # ============================================================================
 # 설정
 # ============================================================================
@@ -24,13 +26,126 @@ DEFAULT_IMAGE_MODEL = os.getenv("IMAGE_MODEL", "gpt-image-1")
 DEFAULT_SIZE = os.getenv("IMAGE_DEFAULT_SIZE", "1024x1024")
 DEFAULT_QUALITY = os.getenv("IMAGE_DEFAULT_QUALITY", "medium")
 BUCKET_NAME = os.getenv("IMAGE_BUCKET", "task-image")
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "5"))  # 일괄 생성 시 동시 요청 수
+IMAGE_UPLOAD_WORKERS = int(os.getenv("IMAGE_UPLOAD_WORKERS", "4"))  # 파이프라인 생성 시 리사이즈/업로드 워커 수
+# 업로드 전 리사이즈 목표 크기 ("WxH"). 빈 값/"0"이면 리사이즈 없이 원본 그대로 업로드
+IMAGE_RESIZE_TO = os.getenv("IMAGE_RESIZE_TO", "512x512")
+
+
+def _parse_size(value: str) -> Optional[Tuple[int, int]]:
+    try:
+        width, height = (int(v) for v in value.lower().split("x"))
+        return (width, height) if width > 0 and height > 0 else None
+    except ValueError:
+        return None
+
+
+_RESIZE_TARGET = _parse_size(IMAGE_RESIZE_TO)
+# 업로드 인코딩 포맷 (WEBP | AVIF | PNG). PNG는 무손실이 필요할 때만 선택
+IMAGE_OUTPUT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "WEBP").upper()
+_SAVE_OPTIONS = {
+    "WEBP": {"quality": 85, "method": 4},
+    "AVIF": {"quality": 80},
+    # optimize=True는 zlib 설정을 반복 탐색해 느림 → 빠른 압축 레벨 사용
+    "PNG": {"compress_level": 1},
+}
+
+# OpenAI/Supabase 클라이언트는 설정별로 프로세스에서 한 번만 생성 (도구 인스턴스마다 커넥션 풀/TLS 재생성 방지)
+_SHARED_CLIENTS: Dict[Tuple[str, ...], Any] = {}
+_SHARED_CLIENTS_LOCK = threading.Lock()
+
+# 같은 (모델, 크기, 품질, 출력 설정, 프롬프트) 요청은 내용 주소 파일명으로 저장해 재생성하지 않음
+_URL_CACHE_SIZE = 512
+_URL_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_URL_CACHE_LOCK = threading.Lock()
+
+
+def _image_cache_key(prompt: str, size: str, quality: str) -> str:
+    source = f"{DEFAULT_IMAGE_MODEL}|{size}|{quality}|{IMAGE_RESIZE_TO}|{IMAGE_OUTPUT_FORMAT}|{prompt}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:24]
+
+
+def _url_cache_get(key: str) -> Optional[str]:
+    with _URL_CACHE_LOCK:
+        url = _URL_CACHE.get(key)
+        if url is not None:
+            _URL_CACHE.move_to_end(key)
+        return url
+
+
+def _url_cache_put(key: str, url: str) -> None:
+    with _URL_CACHE_LOCK:
+        _URL_CACHE[key] = url
+        _URL_CACHE.move_to_end(key)
+        if len(_URL_CACHE) > _URL_CACHE_SIZE:
+            _URL_CACHE.popitem(last=False)
+
+
+def _is_duplicate_error(err: Exception) -> bool:
+    """Storage 업로드가 '이미 존재하는 객체'(409 Duplicate)로 실패했는지 판별."""
+    text = str(err).lower()
+    return "409" in text or "duplicate" in text or "already exists" in text
+
+
+# 리사이즈/인코딩/업로드를 다음 이미지 생성과 겹쳐 실행하기 위한 공용 워커 풀
+_UPLOAD_POOL = ThreadPoolExecutor(max_workers=max(1, IMAGE_UPLOAD_WORKERS), thread_name_prefix="image-upload")
+
+
+def _shared_client(key: Tuple[str, ...], factory: Callable[[], Any]) -> Any:
+    client = _SHARED_CLIENTS.get(key)
+    if client is None:
+        with _SHARED_CLIENTS_LOCK:
+            client = _SHARED_CLIENTS.get(key)
+            if client is None:
+                client = _SHARED_CLIENTS[key] = factory()
+    return client
+
+
+def _encode_for_upload(image_data: bytes, filename: str) -> Tuple[bytes, str]:
+    """IMAGE_RESIZE_TO 크기 / IMAGE_OUTPUT_FORMAT 포맷으로 인코딩한 (데이터, 포맷).
+    불필요하거나 실패하면 원본 PNG를 그대로 반환."""
+    target, fmt = _RESIZE_TARGET, IMAGE_OUTPUT_FORMAT
+    if target is None and fmt == "PNG":
+        return image_data, "PNG"
+    try:
+        logger.debug("🖼️ 이미지 리사이즈/인코딩 시도 시작 | filename=%s format=%s", filename, fmt)
+        from PIL import Image
+        from io import BytesIO
+
+        # Image.open은 헤더만 읽음 → 목표 크기 이하의 PNG면 디코드/재인코딩 없이 원본 업로드
+        with Image.open(BytesIO(image_data)) as img:
+            original_size = getattr(img, "size", None)
+            width, height = original_size
+            # 목표 크기 이하면 확대하지 않음
+            resize = target is not None and (width > target[0] or height > target[1])
+            if not resize and fmt == "PNG":
+                logger.info("⏭️ 이미지 리사이즈 생략: 목표 크기 이하 | filename=%s size=%s", filename, original_size)
+                return image_data, "PNG"
+            if not resize:
+                img_out = img
+            elif width % target[0] == 0 and height % target[1] == 0 and width // target[0] == height // target[1]:
+                # 정확한 정수배 축소(예: 1024→512)는 box reduce 한 번으로 충분 (Lanczos 대비 수 배 빠름)
+                img_out = img.reduce(width // target[0])
+            else:
+                # reducing_gap: 정수배 box 축소(reduce)를 먼저 적용한 뒤 Lanczos → 큰 원본에서 수 배 빠름
+                img_out = img.resize(target, Image.LANCZOS, reducing_gap=2.0)
+
+            out = BytesIO()
+            img_out.save(out, format=fmt, **_SAVE_OPTIONS.get(fmt, {}))
+        logger.info("✅ 이미지 인코딩 완료 | filename=%s %s → %s %s", filename, original_size, img_out.size, fmt)
+        return out.getvalue(), fmt
+    except ImportError:
+        logger.warning("⚠️ Pillow 미설치: 원본 PNG로 업로드 | filename=%s", filename)
+    except Exception as re:
+        logger.warning("⚠️ 이미지 리사이즈/인코딩 실패(원본 업로드로 계속) | filename=%s err=%s", filename, re)
+    return image_data, "PNG"
 
 # ============================================================================
 # 스키마
 # ============================================================================
 class ImageGenSchema(BaseModel):
     prompt: str = Field(..., description="생성할 이미지 설명")
-    filename: Optional[str] = Field(None, description="저장 파일명(.png 권장). 없으면 자동 생성")
+    filename: Optional[str] = Field(None, description="저장 파일명. 확장자는 업로드 포맷(IMAGE_OUTPUT_FORMAT)에 맞게 보정. 없으면 자동 생성")
     size: str = Field(
         DEFAULT_SIZE,
         description="이미지 크기 (예: 1024x1024 | 1536x1024 | 1024x1536)"
@@ -54,8 +169,12 @@ class ImageGenTool(BaseTool):
     )
     args_schema: Type[ImageGenSchema] = ImageGenSchema
 
-    _client: OpenAI = PrivateAttr()
-    _supabase: Client = PrivateAttr()
+    # openai/supabase는 도구 생성 시점에 지연 import (모듈 import만으로 무거운 의존성을 로드하지 않음)
+    _client: Any = PrivateAttr()
+    _supabase: Any = PrivateAttr()
+    _bucket: Any = PrivateAttr()
+    _api_key: str = PrivateAttr()
+    _base_url: Optional[str] = PrivateAttr(default=None)
 
     def __init__(self, **data):
         super().__init__(**data)
@@ -66,7 +185,13 @@ class ImageGenTool(BaseTool):
             logger.error("❌ OpenAI 클라이언트 초기화 실패: OPENAI_API_KEY 없음")
             raise ValueError("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다.")
         base_url = os.getenv("OPENAI_BASE_URL")  # 없으면 SDK 기본값 사용
-        self._client = OpenAI(api_key=api_key, base_url=base_url)
+        from openai import OpenAI
+        self._client = _shared_client(
+            ("openai", api_key, base_url or ""),
+            lambda: OpenAI(api_key=api_key, base_url=base_url),
+        )
+        self._api_key = api_key
+        self._base_url = base_url
 
         # ── Supabase 클라이언트 ───────────────────────────────────────────
         supabase_url = os.getenv("SUPABASE_URL", "")
@@ -75,7 +200,12 @@ class ImageGenTool(BaseTool):
             logger.error("❌ Supabase 클라이언트 초기화 실패: 환경 변수 없음 | url=%s key=%s", bool(supabase_url), bool(supabase_key))
             raise ValueError("SUPABASE_URL 또는 SUPABASE_KEY 환경 변수가 설정되지 않았습니다.")
         try:
-            self._supabase = create_client(supabase_url, supabase_key)
+            from supabase import create_client
+            self._supabase = _shared_client(
+                ("supabase", supabase_url, supabase_key),
+                lambda: create_client(supabase_url, supabase_key),
+            )
+            self._bucket = self._supabase.storage.from_(BUCKET_NAME)  # 업로드/공개 URL에서 재사용
             logger.info("✅ Supabase 클라이언트 초기화 완료")
         except Exception as e:
             logger.error("❌ Supabase 클라이언트 초기화 실패 | err=%s", str(e), exc_info=True)
@@ -86,31 +216,49 @@ class ImageGenTool(BaseTool):
     # ─────────────────────────────────────────────────────────────────────
     # 내부 유틸: 업로드 (실패 시 예외)
     # ─────────────────────────────────────────────────────────────────────
-    def _upload_to_supabase(self, image_data: bytes, filename: str) -> str:
+    def _find_cached_image(self, cache_key: str) -> Optional[str]:
+        """내용 주소 파일명으로 이미 업로드된 이미지가 있으면 공개 URL 반환 (HEAD 한 번)."""
+        url = _url_cache_get(cache_key)
+        if url is not None:
+            return url
+        try:
+            import httpx
+            http = _shared_client(("httpx",), lambda: httpx.Client(timeout=5.0))
+            for ext in dict.fromkeys((IMAGE_OUTPUT_FORMAT.lower(), "png")):
+                candidate = self._bucket.get_public_url(f"cache_{cache_key}.{ext}")
+                if http.head(candidate).status_code == 200:
+                    _url_cache_put(cache_key, candidate)
+                    return candidate
+        except Exception as e:
+            logger.warning("⚠️ 이미지 캐시 조회 실패(새로 생성) | key=%s err=%s", cache_key, e)
+        return None
+
+    def _upload_to_supabase(self, image_data: bytes, filename: str, reuse_existing: bool = False) -> str:
+        """업로드 후 공개 URL 반환. 기존 객체는 덮어쓰지 않는다(upsert=false).
+        reuse_existing=True(내용 주소 파일명)면 같은 이름의 객체가 이미 있을 때 그 URL을 캐시 적중으로 반환."""
         logger.info("☁️ Supabase Storage 업로드 시작 | filename=%s size=%d bytes", filename, len(image_data))
         
         try:
-            # 선택적 리사이즈(512x512). 실패해도 원본 업로드는 계속 진행.
-            try:
-                logger.debug("🖼️ 이미지 리사이즈 시도 시작 | filename=%s", filename)
-                from PIL import Image
-                from io import BytesIO
-
-                img = Image.open(BytesIO(image_data))
-                original_size = getattr(img, "size", None)
-                img_resized = img.resize((512, 512), Image.LANCZOS)
-
-                out = BytesIO()
-                img_resized.save(out, format="PNG", optimize=True)
-                image_data = out.getvalue()
-                logger.info("✅ 이미지 리사이즈 완료 | filename=%s %s → 512x512", filename, original_size)
-            except ImportError:
-                logger.warning("⚠️ Pillow 미설치: 원본 크기로 업로드 | filename=%s", filename)
-            except Exception as re:
-                logger.warning("⚠️ 이미지 리사이즈 실패(원본 업로드로 계속) | filename=%s err=%s", filename, re)
+            # 선택적 리사이즈/포맷 변환. 실패해도 원본 PNG 업로드는 계속 진행.
+            image_data, fmt = _encode_for_upload(image_data, filename)
+            ext = fmt.lower()
+            if ext != "png":
+                filename = f"{filename.rsplit('.', 1)[0]}.{ext}"
 
             # 업로드 (오류 시 예외)
-            res = self._supabase.storage.from_(BUCKET_NAME).upload(filename, image_data)
+            # content-type을 명시해 SDK 기본값(text/plain)으로 저장되지 않도록 함
+            # upsert=false라 한 번 올린 객체의 내용은 바뀌지 않음 → CDN/브라우저 장기 캐시 허용
+            try:
+                res = self._bucket.upload(
+                    filename, image_data, file_options={"content-type": f"image/{ext}", "cache-control": "31536000", "upsert": "false"}
+                )
+            except Exception as e:
+                if not (reuse_existing and _is_duplicate_error(e)):
+                    raise
+                # 동시 요청이 같은 내용 주소 파일을 먼저 올린 경우 → 기존 객체 재사용
+                public_url = self._bucket.get_public_url(filename)
+                logger.info("✅ 이미 업로드된 이미지 재사용 | filename=%s url=%s", filename, public_url)
+                return public_url
             # supabase-py는 성공 시 dict/Response 객체를 반환(버전별 상이); 실패 시 예외 또는 오류 응답
             # 오류 응답을 반환하는 경우도 있으니 간단 검증
             if res is None:
@@ -118,7 +266,7 @@ class ImageGenTool(BaseTool):
                 raise RuntimeError("Supabase Storage 업로드 실패(res=None)")
 
             # 공개 URL
-            public_url = self._supabase.storage.from_(BUCKET_NAME).get_public_url(filename)
+            public_url = self._bucket.get_public_url(filename)
             if not public_url:
                 logger.error("❌ Supabase Storage 공개 URL 생성 실패 | filename=%s", filename)
                 raise RuntimeError("Supabase Storage 공개 URL 생성 실패")
@@ -130,6 +278,34 @@ class ImageGenTool(BaseTool):
             logger.error("❌ Supabase Storage 업로드 실패 | filename=%s err=%s", filename, str(e), exc_info=True)
             raise
 
+    # ─────────────────────────────────────────────────────────────────────
+    # 내부 유틸: 파일명 보정 / 응답 디코딩 (실패 시 예외)
+    # ─────────────────────────────────────────────────────────────────────
+    @staticmethod
+    def _resolve_filename(filename: Optional[str]) -> str:
+        # 파일명 자동 생성
+        if not filename:
+            return f"generated_image_{datetime.now():%Y%m%d_%H%M%S_%f}_{uuid.uuid4().hex[:8]}.png"
+        # 이미 .png(대소문자 무관)면 확장자 보정 불필요
+        if filename.lower().endswith(".png"):
+            return filename
+        # 확장자 보정
+        return f"{Path(filename).stem}.png"
+
+    @staticmethod
+    def _decode_image(resp: Any) -> bytes:
+        if not getattr(resp, "data", None):
+            logger.error("❌ OpenAI 이미지 생성 실패: 응답 데이터 없음")
+            raise RuntimeError("이미지 생성 응답이 비어 있습니다(data 없음).")
+        b64 = resp.data[0].b64_json
+        if not b64:
+            logger.error("❌ OpenAI 이미지 생성 실패: b64_json 없음")
+            raise RuntimeError("이미지 생성 응답에 b64_json이 없습니다.")
+
+        logger.info("✅ OpenAI 이미지 생성 완료 | b64_length=%d", len(b64))
+        # a2b_base64는 ASCII str을 그대로 받아 디코드 (b64decode의 ascii 인코딩 사본 생략)
+        return binascii.a2b_base64(b64)
+
     # ─────────────────────────────────────────────────────────────────────
     # BaseTool 인터페이스: 실행 (실패 시 예외, 폴백 없음)
     # ─────────────────────────────────────────────────────────────────────
@@ -147,14 +323,16 @@ class ImageGenTool(BaseTool):
             logger.error("❌ 이미지 생성 실패: 빈 프롬프트")
             raise ValueError("prompt가 비어 있습니다.")
 
-        # 파일명 자동 생성
+        # 파일명을 지정하지 않은 요청은 내용 주소 파일명으로 저장 → 같은 요청이면 생성 없이 기존 URL 반환
+        cache_key = None
         if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            unique = uuid.uuid4().hex[:8]
-            filename = f"generated_image_{timestamp}_{unique}.png"
-        # 확장자 보정
-        if not filename.lower().endswith(".png"):
-            filename = f"{Path(filename).stem}.png"
+            cache_key = _image_cache_key(prompt, size, quality)
+            cached_url = self._find_cached_image(cache_key)
+            if cached_url:
+                logger.info("✅ 이미지 캐시 사용 | key=%s url=%s", cache_key, cached_url)
+                return cached_url
+            filename = f"cache_{cache_key}.png"
+        filename = self._resolve_filename(filename)
 
         logger.info("[image_gen] size=%s, quality=%s, file=%s", size, quality, filename)
 
@@ -169,19 +347,13 @@ class ImageGenTool(BaseTool):
                 response_format="b64_json",  # 명시
             )
 
-            if not getattr(resp, "data", None):
-                logger.error("❌ OpenAI 이미지 생성 실패: 응답 데이터 없음")
-                raise RuntimeError("이미지 생성 응답이 비어 있습니다(data 없음).")
-            b64 = resp.data[0].b64_json
-            if not b64:
-                logger.error("❌ OpenAI 이미지 생성 실패: b64_json 없음")
-                raise RuntimeError("이미지 생성 응답에 b64_json이 없습니다.")
-
-            logger.info("✅ OpenAI 이미지 생성 완료 | b64_length=%d", len(b64))
-            image_bytes = base64.b64decode(b64)
+            image_bytes = self._decode_image(resp)
+            del resp  # base64 원문을 업로드 전에 해제해 최대 메모리 사용량 절감
 
             # 업로드 (오류 시 예외)
-            public_url = self._upload_to_supabase(image_bytes, filename)
+            public_url = self._upload_to_supabase(image_bytes, filename, reuse_existing=cache_key is not None)
+            if cache_key is not None:
+                _url_cache_put(cache_key, str(public_url))
 
             # 반환: 공개 URL 문자열(마크다운 감싸지 않음)
             logger.info("✅ 이미지 생성 및 업로드 완료 | filename=%s url=%s", filename, public_url)
@@ -190,3 +362,74 @@ class ImageGenTool(BaseTool):
         except Exception as e:
             logger.error("❌ 이미지 생성 처리 중 오류 | prompt=%s filename=%s err=%s", prompt[:100] if prompt else "", filename, str(e), exc_info=True)
             raise
+
+    # ─────────────────────────────────────────────────────────────────────
+    # 일괄 생성: 여러 프롬프트를 동시에 생성/업로드 (N·T → ceil(N/C)·T)
+    # ─────────────────────────────────────────────────────────────────────
+    async def _arun_many(
+        self,
+        prompts: List[str],
+        size: str = DEFAULT_SIZE,
+        quality: str = DEFAULT_QUALITY,
+    ) -> List[str]:
+        """프롬프트 목록을 IMAGE_CONCURRENCY개씩 동시에 생성해 업로드하고, 입력 순서대로 공개 URL 목록을 반환."""
+        if any(not p or not p.strip() for p in prompts):
+            logger.error("❌ 이미지 일괄 생성 실패: 빈 프롬프트 포함")
+            raise ValueError("prompt가 비어 있습니다.")
+
+        from openai import AsyncOpenAI
+
+        logger.info("\n\n🎨 이미지 일괄 생성 시작 | count=%d concurrency=%d size=%s quality=%s", len(prompts), IMAGE_CONCURRENCY, size, quality)
+        sem = asyncio.Semaphore(max(1, IMAGE_CONCURRENCY))
+
+        async def _one(client: Any, prompt: str) -> str:
+            filename = self._resolve_filename(None)
+            async with sem:
+                resp = await client.images.generate(
+                    model=DEFAULT_IMAGE_MODEL,
+                    prompt=prompt,
+                    size=size,
+                    quality=quality,
+                    n=1,
+                    response_format="b64_json",
+                )
+            image_bytes = self._decode_image(resp)
+            del resp
+            # 리사이즈/업로드는 동기 SDK이므로 스레드에서 실행
+            return str(await asyncio.to_thread(self._upload_to_supabase, image_bytes, filename))
+
+        async with AsyncOpenAI(api_key=self._api_key, base_url=self._base_url) as client:
+            urls = await asyncio.gather(*(_one(client, p) for p in prompts))
+
+        logger.info("✅ 이미지 일괄 생성 및 업로드 완료 | count=%d", len(urls))
+        return list(urls)
+
+    def _run_pipelined(
+        self,
+        prompts: List[str],
+        size: str = DEFAULT_SIZE,
+        quality: str = DEFAULT_QUALITY,
+    ) -> List[str]:
+        """동기 일괄 생성: 이미지 i의 리사이즈/업로드를 워커에 넘기고 바로 i+1을 생성 (입력 순서대로 URL 반환)."""
+        if any(not p or not p.strip() for p in prompts):
+            logger.error("❌ 이미지 일괄 생성 실패: 빈 프롬프트 포함")
+            raise ValueError("prompt가 비어 있습니다.")
+
+        logger.info("\n\n🎨 이미지 파이프라인 생성 시작 | count=%d workers=%d size=%s quality=%s", len(prompts), IMAGE_UPLOAD_WORKERS, size, quality)
+        uploads = []
+        for prompt in prompts:
+            resp = self._client.images.generate(
+                model=DEFAULT_IMAGE_MODEL,
+                prompt=prompt,
+                size=size,
+                quality=quality,
+                n=1,
+                response_format="b64_json",
+            )
+            image_bytes = self._decode_image(resp)
+            del resp
+            uploads.append(_UPLOAD_POOL.submit(self._upload_to_supabase, image_bytes, self._resolve_filename(None)))
+
+        urls = [str(future.result()) for future in uploads]
+        logger.info("✅ 이미지 파이프라인 생성 및 업로드 완료 | count=%d", len(urls))
+        return urls
@@ -1,13 +1,20 @@
 from __future__ import annotations
 import os
+import asyncio
+import heapq
 import logging
+import threading
+import weakref
 import zlib
-from typing import Optional, List, Type
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, List, Type
 from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from crewai.tools import BaseTool
 from dotenv import load_dotenv
 from mem0 import Memory
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from sqlalchemy import text as sql_text
 import vecs
 
@@ -63,6 +70,15 @@ def _apply_vecs_drop_if_exists_patch():
         lock_key_src = f"{schema}.{self.table.name}"
         lock_key = abs(zlib.crc32(f"vecs:{lock_key_src}".encode()))
 
+        # 빠른 경로: 인덱스가 이미 있으면(대부분의 warm DB) advisory lock 없이 바로 스킵
+        try:
+            setattr(self, "_index", None)
+        except Exception:
+            pass
+        if self.index is not None:
+            logger.info(f"⏩ [vecs] {lock_key_src}: 인덱스 이미 존재({self.index}) → 잠금 없이 생성 스킵")
+            return None
+
         with self.client.Session() as sess:
             # 대기 시간도 로그로 보이게
             sess.execute(sql_text("SET LOCAL lock_timeout = '15s'"))
@@ -95,6 +111,10 @@ def _apply_vecs_drop_if_exists_patch():
 # 🔹 모듈 로드 시점에 무조건 패치 적용 (eager)
 _apply_vecs_drop_if_exists_patch()
 
+# mem0 Memory 설정은 사용자와 무관(user_id는 검색 시 전달)하므로 프로세스에서 한 번만 생성해 공유
+_MEMORY: Optional[Memory] = None
+_MEMORY_LOCK = threading.Lock()
+
 # ============================================================================
 # 스키마 정의
 # ============================================================================
@@ -158,7 +178,16 @@ class Mem0Tool(BaseTool):
         logger.info("\n\n✅ Mem0Tool 초기화 완료 | user_id=%s, namespace=%s", self._user_id, self._namespace)
 
     def _initialize_memory(self) -> Memory:
-        """Memory 인스턴스 초기화 - 에이전트별 (안전화 버전)"""
+        """공유 Memory 인스턴스 반환 (최초 1회만 초기화, 안전화 버전)"""
+        global _MEMORY
+        if _MEMORY is None:
+            with _MEMORY_LOCK:
+                if _MEMORY is None:
+                    _MEMORY = self._create_memory()
+        return _MEMORY
+
+    def _create_memory(self) -> Memory:
+        """Memory 인스턴스 생성 (vector store 연결/컬렉션 준비)"""
         config = {
             "vector_store": {
                 "provider": "supabase",
@@ -200,11 +229,13 @@ class Mem0Tool(BaseTool):
 
             THRESHOLD = 0.5
             MIN_RESULTS = 5
-            hits_sorted = sorted(hits, key=lambda x: x.get("score", 0), reverse=True)
-            filtered_hits = [h for h in hits_sorted if h.get("score", 0) >= THRESHOLD]
-            if len(filtered_hits) < MIN_RESULTS:
-                filtered_hits = hits_sorted[:MIN_RESULTS]
-            hits = filtered_hits
+            score = lambda h: h.get("score", 0)
+            filtered_hits = [h for h in hits if score(h) >= THRESHOLD]
+            if len(filtered_hits) >= MIN_RESULTS:
+                hits = sorted(filtered_hits, key=score, reverse=True)
+            else:
+                # 임계값 이상이 부족하면 전체 정렬 없이 상위 MIN_RESULTS개만 선택
+                hits = heapq.nlargest(MIN_RESULTS, hits, key=score)
 
             logger.info("📊 개인지식 검색 결과: %d개 (임계값: %.2f) | user_id=%s", len(hits), THRESHOLD, self._user_id)
             if not hits:
@@ -217,6 +248,10 @@ class Mem0Tool(BaseTool):
             logger.error("❌ 개인지식 검색 실패 | user_id=%s err=%s", self._user_id, str(e), exc_info=True)
             raise
 
+    async def _arun(self, query: str) -> str:
+        """비동기 검색: vecs/SQL 검색은 동기이므로 스레드에서 실행 (memento 검색과 gather 가능)"""
+        return await asyncio.to_thread(self._run, query)
+
     def _format_results(self, hits: List[dict]) -> str:
         items = []
         for idx, hit in enumerate(hits, start=1):
@@ -228,6 +263,37 @@ class Mem0Tool(BaseTool):
 # ============================================================================
 # 사내 문서 검색 (memento) 도구
 # ============================================================================
+# memento API 호출은 keep-alive 세션 하나를 공유 (호출마다 TCP/TLS 핸드셰이크 방지), 일시 오류는 백오프 재시도
+MEMENTO_URL = "https://memento.process-gpt.io/api/retrieve"
+_MEMENTO_SESSION = requests.Session()
+_MEMENTO_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504), allowed_methods=("GET",)),
+    ),
+)
+
+# 비동기 경로(_arun)용 httpx 클라이언트: 커넥션 풀이 이벤트 루프에 묶이므로 루프별로 하나씩 공유
+_MEMENTO_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def _memento_async_client() -> Any:
+    import httpx
+    loop = asyncio.get_running_loop()
+    client = _MEMENTO_ASYNC_CLIENTS.get(loop)
+    if client is None:
+        try:  # HTTP/2는 h2 패키지가 있을 때만 사용
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        client = _MEMENTO_ASYNC_CLIENTS[loop] = httpx.AsyncClient(
+            http2=http2, timeout=40.0, limits=httpx.Limits(max_connections=32)
+        )
+    return client
+
 class MementoQuerySchema(BaseModel):
     query: str = Field(..., description="검색 키워드 또는 질문")
 
@@ -264,50 +330,77 @@ class MementoTool(BaseTool):
         
         try:
             logger.info("🔍 사내문서 검색 시작 | tenant_id=%s, query=%s", self._tenant_id, query)
-            resp = requests.get(
-                "https://memento.process-gpt.io/api/retrieve",
+            resp = _MEMENTO_SESSION.get(
+                MEMENTO_URL,
                 params={"query": query, "tenant_id": self._tenant_id},
-                headers={"Accept": "application/json"},
+                headers={"Accept": "application/json", "Accept-Encoding": "gzip"},
                 timeout=40,
             )
             resp.raise_for_status()
-            # 응답 본문이 비어있거나 JSON이 아닐 수 있으므로 견고하게 처리
-            content_type = (resp.headers.get("Content-Type") or "").lower()
-            raw_text = resp.text or ""
-            if not raw_text.strip():
-                logger.info("📭 사내문서 검색 빈 응답 | tenant_id=%s query=%s status=%s", self._tenant_id, query, resp.status_code)
-                return f"테넌트 '{self._tenant_id}'에서 '{query}' 검색 결과가 없습니다."
+            return self._format_response(query, resp)
 
-            try:
-                data = resp.json()
-            except Exception:
-                logger.warning(
-                    "❌ 사내문서 JSON 파싱 실패 | tenant_id=%s status=%s content_type=%s snippet=%s",
-                    self._tenant_id,
-                    resp.status_code,
-                    content_type,
-                    raw_text[:200],
-                )
-                return f"사내문서 검색 응답이 JSON이 아닙니다 (status={resp.status_code}, content_type='{content_type}')."
-                
-            docs = data.get("response", [])
-            logger.info("📄 사내문서 검색 결과: %d개", len(docs))
-            if not docs:
-                logger.info("📭 사내문서 검색 결과 없음 | tenant_id=%s query=%s", self._tenant_id, query)
-                return f"테넌트 '{self._tenant_id}'에서 '{query}' 검색 결과가 없습니다."
-
-            results = []
-            for doc in docs:
-                meta = doc.get("metadata", {}) or {}
-                fname = meta.get("file_name", "unknown")
-                idx = meta.get("chunk_index", "unknown")
-                content = doc.get("page_content", "")
-                results.append(f"📄 파일: {fname} (청크 #{idx})\n내용: {content}\n---")
-
-            formatted_result = f"테넌트 '{self._tenant_id}'에서 '{query}' 검색 결과:\n\n" + "\n".join(results)
-            logger.info("✅ 사내문서 검색 완료 | tenant_id=%s", self._tenant_id)
-            return formatted_result
+        except Exception as e:
+            logger.error("❌ 사내문서 검색 실패 | tenant_id=%s query=%s err=%s", self._tenant_id, query, str(e), exc_info=True)
+            raise
+
+    def _run_batch(self, queries: List[str]) -> List[str]:
+        """여러 쿼리를 동시에 검색 (입력 순서대로 결과 반환)."""
+        if not queries:
+            return []
+        with ThreadPoolExecutor(max_workers=min(8, len(queries))) as ex:
+            return list(ex.map(self._run, queries))
+
+    async def _arun(self, query: str) -> str:
+        """비동기 검색: 루프별 공유 httpx.AsyncClient(HTTP/2 가능) 사용 → 여러 검색을 gather로 동시 처리"""
+        logger.info("\n\n🔍 사내문서 검색 시작(async) | tenant_id=%s, query=%s", self._tenant_id, query)
+        try:
+            resp = await _memento_async_client().get(
+                MEMENTO_URL,
+                params={"query": query, "tenant_id": self._tenant_id},
+                headers={"Accept": "application/json"},
+            )
+            resp.raise_for_status()
+            return self._format_response(query, resp)
 
         except Exception as e:
             logger.error("❌ 사내문서 검색 실패 | tenant_id=%s query=%s err=%s", self._tenant_id, query, str(e), exc_info=True)
             raise
+
+    def _format_response(self, query: str, resp: Any) -> str:
+        """memento 응답(requests/httpx 공통)을 결과 문자열로 변환"""
+        # 응답 본문이 비어있거나 JSON이 아닐 수 있으므로 견고하게 처리
+        content_type = (resp.headers.get("Content-Type") or "").lower()
+        raw_text = resp.text or ""
+        if not raw_text.strip():
+            logger.info("📭 사내문서 검색 빈 응답 | tenant_id=%s query=%s status=%s", self._tenant_id, query, resp.status_code)
+            return f"테넌트 '{self._tenant_id}'에서 '{query}' 검색 결과가 없습니다."
+
+        try:
+            data = resp.json()
+        except Exception:
+            logger.warning(
+                "❌ 사내문서 JSON 파싱 실패 | tenant_id=%s status=%s content_type=%s snippet=%s",
+                self._tenant_id,
+                resp.status_code,
+                content_type,
+                raw_text[:200],
+            )
+            return f"사내문서 검색 응답이 JSON이 아닙니다 (status={resp.status_code}, content_type='{content_type}')."
+            
+        docs = data.get("response", [])
+        logger.info("📄 사내문서 검색 결과: %d개", len(docs))
+        if not docs:
+            logger.info("📭 사내문서 검색 결과 없음 | tenant_id=%s query=%s", self._tenant_id, query)
+            return f"테넌트 '{self._tenant_id}'에서 '{query}' 검색 결과가 없습니다."
+
+        results = []
+        for doc in docs:
+            meta = doc.get("metadata", {}) or {}
+            fname = meta.get("file_name", "unknown")
+            idx = meta.get("chunk_index", "unknown")
+            content = doc.get("page_content", "")
+            results.append(f"📄 파일: {fname} (청크 #{idx})\n내용: {content}\n---")
+
+        formatted_result = f"테넌트 '{self._tenant_id}'에서 '{query}' 검색 결과:\n\n" + "\n".join(results)
+        logger.info("✅ 사내문서 검색 완료 | tenant_id=%s", self._tenant_id)
+        return formatted_result
@@ -429,17 +429,23 @@ class SafeToolLoader:
 
         import asyncio
         async def _create_all():
+            specs = []
             for name in a2a_names:
                 endpoint = self._resolve_a2a_endpoint(name, a2a_endpoints)
                 if not endpoint:
                     logger.warning("⚠️ A2A 엔드포인트 누락 → 스킵 | name=%s", name)
                     continue
-                try:
-                    tool = await A2AAgentTool.create(endpoint=endpoint, name=f"A2A:{name}", timeout_sec=60)
-                    loaded.append(tool)
-                    logger.info("✅ A2A 로드 완료 | name=%s url=%s", name, endpoint.url)
-                except Exception as e:
-                    logger.error("❌ A2A 로드 실패 | name=%s err=%s", name, str(e), exc_info=True)
+                specs.append((endpoint, f"A2A:{name}", 60))
+            if not specs:
+                return
+            # AgentCard 조회를 동시에 수행(순서 유지). 실패는 툴별로 격리해 나머지는 계속 로드
+            tools = await A2AAgentTool.create_many(specs, return_exceptions=True)
+            for (endpoint, tool_name, _), tool in zip(specs, tools):
+                if isinstance(tool, BaseException):
+                    logger.error("❌ A2A 로드 실패 | name=%s err=%s", tool_name, str(tool), exc_info=tool)
+                    continue
+                loaded.append(tool)
+                logger.info("✅ A2A 로드 완료 | name=%s url=%s", tool_name, endpoint.url)
 
         try:
             try:
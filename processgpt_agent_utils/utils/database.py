@@ -4,6 +4,7 @@ import os
 import asyncio
 import logging
 import random
+import threading
 from typing import Any, Dict, Optional, Callable, TypeVar, List
 import time
 import uuid
@@ -63,6 +64,7 @@ def _retry_sync(
 # DB Client (same style/policy as database.py)
 # -----------------------------------------------------------------------------
 _db_client: Optional[Client] = None
+_db_credentials: Optional[tuple] = None  # Realtime(비동기) 클라이언트 생성용 (url, key)
 
 def initialize_db() -> None:
     """
@@ -71,7 +73,7 @@ def initialize_db() -> None:
     - 환경변수 키 우선순위: (URL) SUPABASE_URL | SUPABASE_KEY_URL / (KEY) SUPABASE_KEY | SUPABASE_ANON_KEY
     - 실패 시 로깅 후 예외 전파(초기화 실패는 치명적)
     """
-    global _db_client
+    global _db_client, _db_credentials
     if _db_client is not None:
         return
     try:
@@ -85,6 +87,7 @@ def initialize_db() -> None:
             raise RuntimeError("SUPABASE_URL 및 SUPABASE_KEY가 필요합니다")
 
         _db_client = create_client(supabase_url, supabase_key)
+        _db_credentials = (supabase_url, supabase_key)
     except Exception as e:
         logger.error("❌ DB 초기화 실패: %s", str(e), exc_info=e)
         raise
@@ -211,6 +214,128 @@ def fetch_human_response_sync(*, job_id: str) -> Optional[Dict[str, Any]]:
     return _retry_sync(_call, name="fetch_human_response")
 
 
+# -----------------------------------------------------------------------------
+# Realtime (events INSERT 구독) — 전용 이벤트 루프 스레드에서 비동기 클라이언트 공유
+# -----------------------------------------------------------------------------
+_realtime_loop: Optional[asyncio.AbstractEventLoop] = None
+_realtime_client: Any = None
+_realtime_lock = threading.Lock()
+
+
+def _get_realtime_loop() -> asyncio.AbstractEventLoop:
+    global _realtime_loop
+    with _realtime_lock:
+        if _realtime_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="supabase-realtime", daemon=True).start()
+            _realtime_loop = loop
+        return _realtime_loop
+
+
+async def _get_realtime_client() -> Any:
+    """Realtime용 비동기 Supabase 클라이언트 (루프 스레드에서만 호출)."""
+    global _realtime_client
+    if _realtime_client is None:
+        if _db_credentials is None:
+            raise RuntimeError("DB 미초기화: initialize_db() 먼저 호출")
+        from supabase import acreate_client
+        _realtime_client = await acreate_client(*_db_credentials)
+    return _realtime_client
+
+
+_REALTIME_SUBSCRIBE_TIMEOUT_SEC = 10.0
+# Realtime 대기 중에도 느린 주기로 직접 조회 (publication 미포함/RLS 등으로 이벤트가 오지 않는 경우 대비)
+_REALTIME_SAFETY_POLL_SEC = 15.0
+
+
+def wait_human_response_realtime(
+    *,
+    job_id: str,
+    timeout_sec: float,
+    cancel_event: Optional[threading.Event] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    events 테이블의 human_response INSERT를 Realtime으로 기다림.
+    - 타임아웃 또는 cancel_event 설정 시 None
+    - 구독 실패/SUBSCRIBED 미도달/CHANNEL_ERROR·TIMED_OUT·CLOSED 시 예외 전파(호출 측에서 폴링으로 전환)
+    - SUBSCRIBED 확인 후 한 번 조회해 구독 전에 도착한 응답도 놓치지 않음
+    - 대기 중에도 _REALTIME_SAFETY_POLL_SEC마다 직접 조회
+    """
+    deadline = time.time() + timeout_sec
+    loop = _get_realtime_loop()
+    wake = threading.Event()
+    subscribed = threading.Event()
+    result: Dict[str, Any] = {}
+
+    def _on_insert(payload: Dict[str, Any]) -> None:
+        data = payload.get("data") or payload
+        record = data.get("record") or data.get("new") or {}
+        if record.get("event_type") == "human_response" and "event" not in result:
+            result["event"] = record
+            wake.set()
+
+    def _on_status(status: Any, err: Optional[Exception] = None) -> None:
+        state = str(getattr(status, "value", status)).upper()
+        if state == "SUBSCRIBED":
+            subscribed.set()
+        elif state in ("CHANNEL_ERROR", "TIMED_OUT", "CLOSED"):
+            result["error"] = f"{state}: {err}" if err else state
+            wake.set()
+            subscribed.set()
+
+    async def _subscribe() -> Any:
+        client = await _get_realtime_client()
+        channel = client.channel(f"human_response:{job_id}")
+        channel.on_postgres_changes(
+            "INSERT",
+            schema="public",
+            table="events",
+            filter=f"job_id=eq.{job_id}",
+            callback=_on_insert,
+        )
+        await channel.subscribe(_on_status)
+        return channel
+
+    async def _unsubscribe(channel: Any) -> None:
+        client = await _get_realtime_client()
+        await client.remove_channel(channel)
+
+    pending = asyncio.run_coroutine_threadsafe(_subscribe(), loop)
+    try:
+        channel = pending.result(timeout=_REALTIME_SUBSCRIBE_TIMEOUT_SEC)
+    except Exception:
+        pending.cancel()
+        raise
+    try:
+        if not subscribed.wait(_REALTIME_SUBSCRIBE_TIMEOUT_SEC) or "error" in result:
+            raise RuntimeError(f"Realtime 채널 구독 실패: {result.get('error', 'SUBSCRIBED 미수신')}")
+
+        next_poll = 0.0  # SUBSCRIBED 직후 즉시 한 번 조회
+        while "event" not in result:
+            if "error" in result:
+                raise RuntimeError(f"Realtime 채널 오류: {result['error']}")
+            now = time.time()
+            if now >= next_poll:
+                try:
+                    event = fetch_human_response_sync(job_id=job_id)
+                    if event:
+                        return event
+                except Exception as e:
+                    logger.warning("⚠️ Realtime 대기 중 직접 조회 실패: job_id=%s error=%s", job_id, str(e))
+                next_poll = time.time() + _REALTIME_SAFETY_POLL_SEC
+            remaining = deadline - time.time()
+            if remaining <= 0 or (cancel_event is not None and cancel_event.is_set()):
+                return None
+            # 응답/채널 오류/취소/다음 조회 시각을 함께 보기 위해 짧게 나눠 대기
+            wake.wait(min(remaining, 0.5, max(0.0, next_poll - time.time())))
+        return result["event"]
+    finally:
+        try:
+            asyncio.run_coroutine_threadsafe(_unsubscribe(channel), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning("⚠️ Realtime 구독 해제 실패: job_id=%s error=%s", job_id, str(e))
+
+
 def save_notification_sync(
     *,
     title: str,